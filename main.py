@@ -1,18 +1,45 @@
+import sys
+
+# Headless batch mode must not pull in tkinter, PIL or matplotlib
+if __name__ == "__main__" and sys.argv[1:2] == ["batch"]:
+    from weather_batch import main as batch_main
+    sys.exit(batch_main(sys.argv[2:]))
+
+import weather_startup
+
+# Startup profiling has to begin before the imports below
+if __name__ == "__main__" and "--profile-startup" in sys.argv[1:]:
+    weather_startup.enable()
+
 import requests
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import json
 import os
-from PIL import Image, ImageTk
+import time
 from io import BytesIO
 from datetime import datetime
-import threading
 import logging
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib
-import csv
-matplotlib.use("TkAgg")
+import tkinter.font as tkfont
+from concurrent.futures import ThreadPoolExecutor
+from weather_cache import ResponseCache, IconCache
+from weather_cities import CityResolver
+from weather_client import WeatherClient, resolve_apis, enable_recording, get_session
+import weather_export
+from weather_history import HistoryStore
+from weather_logview import LogIndex, LEVELS
+from weather_logging import setup_logging
+from weather_config import ConfigStore
+from weather_snapshot import make_snapshot, load_snapshot
+from weather_requests import RequestManager
+from weather_scheduler import RefreshScheduler
+from weather_metrics import metrics, span
+import weather_units
+
+LOG_FILE = 'weather_app.log'
+# Number of pooled cards on the Forecast tab
+FORECAST_DAYS = 5
+
 
 class WeatherApp:
     def __init__(self, root):
@@ -21,35 +48,85 @@ class WeatherApp:
         self.root.geometry("900x700")
         self.root.minsize(800, 600)
         
-        # Setup logging
-        logging.basicConfig(filename='weather_app.log', level=logging.INFO,
-                           format='%(asctime)s - %(levelname)s - %(message)s')
-        
         # Config
         self.config_file = "weather_config.json"
         self.config = self.load_config()
+        self.config_store = ConfigStore(
+            self.config_file, initial=self.config,
+            on_error=lambda e: self.root.after(0, lambda: messagebox.showerror(
+                "Error", f"Could not save configuration: {str(e)}")))
+        
+        # Setup logging (records are written by a background thread)
+        self.log_listener = setup_logging(
+            LOG_FILE,
+            max_bytes=self.config.get('log_max_bytes', 5 * 1024 * 1024),
+            backup_count=self.config.get('log_backup_count', 5),
+            rotate_hours=self.config.get('log_rotate_hours', 24),
+            structured=self.config.get('log_format', 'text') == 'json')
         self.api_key = self.config.get('api_key', '')
         self.units = tk.StringVar(value=self.config.get('units', 'metric'))
         self.theme = tk.StringVar(value=self.config.get('theme', 'light'))
         self.current_city = tk.StringVar()
+        
+        # Settings tab variables exist before the tab is built (on first view)
+        self.api_key_var = tk.StringVar(value=self.api_key)
+        self.show_key_var = tk.BooleanVar(value=False)
+        self.auto_refresh_var = tk.BooleanVar(value=self.config.get('auto_refresh', False))
+        self.refresh_interval = tk.StringVar(value=str(self.config.get('refresh_interval', 30)))
+        
+        # Charts tab state; matplotlib is loaded when the tab is first shown
+        self.chart_type = tk.StringVar(value="temperature")
+        self.chart_range = tk.StringVar(value="forecast")
+        self.charts_city_label = None
+        self.chart_canvas = None
         self.favorite_cities = self.config.get('favorite_cities', [])
         self.search_history = self.config.get('search_history', [])
         
         # API selection
-        self.available_apis = {
-            'openweathermap': {
-                'name': 'OpenWeatherMap',
-                'current_url': 'http://api.openweathermap.org/data/2.5/weather',
-                'forecast_url': 'http://api.openweathermap.org/data/2.5/forecast',
-                'icon_url': 'http://openweathermap.org/img/wn/{icon}@2x.png'
-            }
-        }
+        # Base URL can be overridden to run against the local mock server
+        self.available_apis = resolve_apis(self.config.get('api_base_url'))
+        enable_recording(self.config.get('record_file'))
         self.active_api = tk.StringVar(value=self.config.get('active_api', 'openweathermap'))
         
         # Data containers
         self.current_weather = None
-        self.forecast_data = None
+        self.dashboard_rows = {}
+        self.forecast_model = None
         self.weather_icons = {}
+        # Icon code each label should show (widget path -> code)
+        self.wanted_icons = {}
+        self.stale_saved_at = None
+        
+        # Response cache stored next to the config file
+        self.data_dir = os.path.dirname(os.path.abspath(self.config_file))
+        cache_dir = os.path.join(self.data_dir, 'weather_cache')
+        self.response_cache = ResponseCache(cache_dir, ttls=self.config.get('cache_ttls'))
+        self.icon_cache = IconCache(os.path.join(cache_dir, 'icons'), session=get_session())
+        
+        # City names resolved to the provider's city ids
+        self.city_resolver = CityResolver(os.path.join(self.data_dir, 'weather_cities.json'))
+        
+        # Shared HTTP client (pooled keep-alive connections)
+        self.weather_client = WeatherClient(session=get_session(), cache=self.response_cache,
+                                            resolver=self.city_resolver)
+        
+        # Single-flight, latest-wins runner for searches and refreshes
+        self.request_manager = RequestManager(max_workers=2)
+        
+        # Rate-limited auto-refresh of the current city and favorites
+        self.refresh_params = None
+        self.refresh_scheduler = RefreshScheduler(
+            self.fetch_scheduled, 
+            lambda city, result, error: self.root.after(
+                0, lambda: self.on_scheduled_refresh(city, result, error)),
+            rate_per_minute=self.config.get('refresh_rate_limit', 60))
+        
+        # Local history of every fetched observation
+        self.history = HistoryStore(os.path.join(self.data_dir, 'weather_history.db'))
+        
+        # Last rendered view, redrawn instantly on the next start
+        self.snapshot_file = os.path.join(self.data_dir, 'weather_snapshot.json')
+        self.snapshot_store = ConfigStore(self.snapshot_file, name='snapshot', indent=None)
         
         # Apply theme before creating widgets
         self.apply_theme()
@@ -57,6 +134,11 @@ class WeatherApp:
         # Create main UI
         self.create_widgets()
         
+        # Warm the icon cache off the UI thread
+        api_info = self.available_apis.get(self.active_api.get())
+        if api_info:
+            self.icon_cache.prefetch(api_info['icon_url'])
+        
         # Show API key prompt if no API key is set
         if not self.api_key:
             self.show_api_key_prompt()
@@ -66,78 +148,155 @@ class WeatherApp:
             if last_city:
                 self.city_entry.insert(0, last_city)
                 self.current_city.set(last_city)
-                self.get_weather()
+                # Draw the last session's view before any network request
+                self.get_weather(saved_at=self.show_snapshot(last_city))
     
     # MISSING METHOD: Export Weather Data
     def export_weather_data(self):
-        """Export current weather data to file"""
-        if not self.current_weather:
-            messagebox.showinfo("Export", "No weather data to export")
-            return
+        """Open dialog to export loaded weather data or stored history"""
+        export_window = tk.Toplevel(self.root)
+        export_window.title("Export Weather Data")
+        export_window.geometry("420x360")
+        export_window.transient(self.root)
+        
+        ttk.Label(export_window, text="Data to export:").pack(anchor=tk.W, padx=10, pady=5)
+        
+        source_var = tk.StringVar(value="loaded" if self.current_weather else "history_all")
+        sources = [
+            ("Current city (loaded data)", "loaded"),
+            ("History for current city", "history_city"),
+            ("History for all cities", "history_all")
+        ]
+        for text, value in sources:
+            ttk.Radiobutton(export_window, text=text, 
+                           variable=source_var, value=value).pack(anchor=tk.W, padx=20)
         
-        city = self.current_city.get()
-        default_filename = f"weather_data_{city}_{datetime.now().strftime('%Y%m%d')}"
+        options_frame = ttk.Frame(export_window)
+        options_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        ttk.Label(options_frame, text="History range (days):").grid(
+            row=0, column=0, sticky=tk.W, padx=5, pady=5)
+        days_var = tk.StringVar(value="30")
+        ttk.Spinbox(options_frame, from_=1, to=3650, textvariable=days_var, 
+                   width=6).grid(row=0, column=1, sticky=tk.W, padx=5, pady=5)
         
-        filename = filedialog.asksaveasfilename(
-            initialfile=default_filename,
-            defaultextension=".json",
-            filetypes=[("JSON Files", "*.json"), ("CSV Files", "*.csv"), ("All Files", "*.*")]
-        )
+        compress_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Compress (gzip)", 
+                       variable=compress_var).grid(row=1, column=0, sticky=tk.W, padx=5, pady=5)
         
-        if not filename:
-            return
+        # Progress
+        progress = ttk.Progressbar(export_window, mode="determinate")
+        progress.pack(fill=tk.X, padx=10, pady=5)
+        progress_label = ttk.Label(export_window, text="")
+        progress_label.pack(anchor=tk.W, padx=10)
         
-        try:
-            if filename.endswith('.json'):
-                with open(filename, 'w') as f:
-                    json.dump({
-                        'current': self.current_weather,
-                        'forecast': self.forecast_data
-                    }, f, indent=2)
-            elif filename.endswith('.csv'):
-                with open(filename, 'w', newline='') as f:
-                    writer = csv.writer(f)
-                    
-                    # Write current weather data
-                    writer.writerow(['City', 'Date', 'Temperature', 'Feels Like', 
-                                     'Description', 'Humidity', 'Pressure', 'Wind Speed'])
-                    
-                    if self.active_api.get() == 'openweathermap':
-                        dt = datetime.fromtimestamp(self.current_weather['dt'])
-                        writer.writerow([
-                            f"{self.current_weather['name']}, {self.current_weather['sys']['country']}",
-                            dt.strftime('%Y-%m-%d %H:%M'),
-                            self.current_weather['main']['temp'],
-                            self.current_weather['main']['feels_like'],
-                            self.current_weather['weather'][0]['description'],
-                            self.current_weather['main']['humidity'],
-                            self.current_weather['main']['pressure'],
-                            self.current_weather['wind']['speed']
-                        ])
-                        
-                        # Write forecast data
-                        writer.writerow([])
-                        writer.writerow(['Forecast'])
-                        writer.writerow(['Date', 'Temperature', 'Min Temp', 'Max Temp', 
-                                        'Description', 'Humidity', 'Wind Speed'])
-                        
-                        for item in self.forecast_data['list']:
-                            dt = datetime.fromtimestamp(item['dt'])
-                            writer.writerow([
-                                dt.strftime('%Y-%m-%d %H:%M'),
-                                item['main']['temp'],
-                                item['main']['temp_min'],
-                                item['main']['temp_max'],
-                                item['weather'][0]['description'],
-                                item['main']['humidity'],
-                                item['wind']['speed']
-                            ])
+        button_frame = ttk.Frame(export_window)
+        button_frame.pack(fill=tk.X, side=tk.BOTTOM, padx=10, pady=10)
+        
+        state = {'job': None}
+        
+        def on_progress(written, total):
+            if not export_window.winfo_exists():
+                return
+            if total:
+                progress.stop()
+                progress.config(mode="determinate", maximum=total, value=written)
+                progress_label.config(text=f"{written:,} of {total:,} rows written")
+            else:
+                progress_label.config(text=f"{written:,} rows written")
+        
+        def on_done(filename, written, error, cancelled):
+            state['job'] = None
+            if not export_window.winfo_exists():
+                return
+            progress.stop()
+            export_btn.config(state=tk.NORMAL)
+            cancel_btn.config(state=tk.DISABLED)
+            if error is not None:
+                progress_label.config(text="Export failed")
+                messagebox.showerror("Export Error", f"Failed to export data: {str(error)}",
+                                     parent=export_window)
+            elif cancelled:
+                progress_label.config(text="Export cancelled")
+            else:
+                progress_label.config(text=f"{written:,} rows exported")
+                messagebox.showinfo("Export", f"Weather data exported to {filename}", 
+                                    parent=export_window)
+        
+        def start_export():
+            source = source_var.get()
+            if source != "history_all" and not self.current_weather:
+                messagebox.showinfo("Export", "No weather data to export", parent=export_window)
+                return
+            try:
+                days = int(days_var.get())
+            except ValueError:
+                messagebox.showerror("Error", "Please enter a valid number of days", 
+                                     parent=export_window)
+                return
             
-            messagebox.showinfo("Export", f"Weather data exported to {filename}")
+            city = self.current_city.get() if source != "history_all" else "all"
+            default_filename = f"weather_data_{city}_{datetime.now().strftime('%Y%m%d')}"
             
-        except Exception as e:
-            logging.error(f"Error exporting data: {str(e)}")
-            messagebox.showerror("Export Error", f"Failed to export data: {str(e)}")
+            filename = filedialog.asksaveasfilename(
+                parent=export_window,
+                initialfile=default_filename,
+                defaultextension=".csv",
+                filetypes=[("CSV Files", "*.csv"), ("JSON Files", "*.json"),
+                           ("JSON Lines Files", "*.jsonl")]
+            )
+            if not filename:
+                return
+            if compress_var.get() and not filename.endswith('.gz'):
+                filename += '.gz'
+            try:
+                weather_export.export_format(filename)
+            except ValueError as e:
+                messagebox.showerror("Export Error", str(e), parent=export_window)
+                return
+            
+            # Rows are generated lazily by the worker thread
+            if source == "loaded":
+                rows = weather_export.loaded_rows(self.current_weather, self.forecast_model,
+                                                  self.units.get())
+                total = None
+            else:
+                city_ids = [self.current_weather.city_id] if source == "history_city" else None
+                t1 = datetime.now().timestamp()
+                t0 = t1 - days * 86400
+                # Counted on the worker thread; progress is indeterminate until then
+                total = lambda: self.history.count_rows(city_ids, t0, t1)
+                rows = self.history.iter_rows(city_ids, t0, t1, units=self.units.get())
+            
+            progress.config(mode="indeterminate", value=0)
+            progress.start(15)
+            progress_label.config(text="Exporting...")
+            export_btn.config(state=tk.DISABLED)
+            cancel_btn.config(state=tk.NORMAL)
+            
+            state['job'] = weather_export.ExportJob(
+                filename, rows, total,
+                progress=lambda w, t: self.root.after(0, lambda: on_progress(w, t)),
+                done=lambda w, e, c: self.root.after(0, lambda: on_done(filename, w, e, c))
+            ).start()
+        
+        def cancel_export():
+            if state['job']:
+                state['job'].cancel()
+        
+        def close_window():
+            cancel_export()
+            export_window.destroy()
+        
+        export_btn = ttk.Button(button_frame, text="Export...", command=start_export)
+        export_btn.pack(side=tk.LEFT, padx=5)
+        
+        cancel_btn = ttk.Button(button_frame, text="Cancel", command=cancel_export, 
+                               state=tk.DISABLED)
+        cancel_btn.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(button_frame, text="Close", command=close_window).pack(side=tk.RIGHT, padx=5)
+        export_window.protocol("WM_DELETE_WINDOW", close_window)
     
     # MISSING METHOD: Clear History
     def clear_history(self):
@@ -149,6 +308,18 @@ class WeatherApp:
             self.save_config()
             messagebox.showinfo("History", "Search history cleared")
     
+    def clear_cache(self):
+        """Clear cached API responses"""
+        stats = self.response_cache.stats()
+        confirm = messagebox.askyesno(
+            "Confirm",
+            f"Clear cached weather data?\n\n"
+            f"Hits: {stats['hits']}  Misses: {stats['misses']}  "
+            f"Hit rate: {stats['hit_rate']:.0%}")
+        if confirm:
+            self.response_cache.clear()
+            messagebox.showinfo("Cache", "Weather data cache cleared")
+    
     # MISSING METHOD: Manage Favorites
     def manage_favorites(self):
         """Open dialog to manage favorite cities"""
@@ -194,6 +365,7 @@ class WeatherApp:
                 fav_listbox.delete(selected)
                 self.save_config()
                 self.update_favorite_button()
+                self.setup_auto_refresh()
         
         def use_selected():
             selected = fav_listbox.curselection()
@@ -298,13 +470,25 @@ class WeatherApp:
         self.notebook.update_idletasks()
         
         # Update chart if it exists
-        if hasattr(self, 'chart_type'):
+        if self.chart_canvas is not None:
             self.update_chart()
         
         # Update config
         self.config['theme'] = self.theme.get()
         self.save_config()
     
+    def change_units(self):
+        """Redisplay loaded data in the selected units (converted locally, no refetch)"""
+        if self.current_weather is not None and self.active_api.get() == 'openweathermap':
+            self.process_openweathermap_data(self.current_weather, self.forecast_model)
+            self.update_chart()
+        
+        for city, (current, updated) in list(self.dashboard_rows.items()):
+            if self.dashboard_tree.exists(city):
+                self.fill_dashboard_row(city, current, updated)
+        
+        self.save_config()
+    
     # MISSING METHOD: On API Change
     def on_api_change(self, event):
         """Handle API provider change"""
@@ -317,68 +501,296 @@ class WeatherApp:
     
     # MISSING METHOD: View Logs
     def view_logs(self):
-        """View application logs"""
+        """View application logs (paged, only visible lines are read)"""
         try:
             log_window = tk.Toplevel(self.root)
             log_window.title("Application Logs")
             log_window.geometry("700x500")
             log_window.transient(self.root)
             
-            log_text = tk.Text(log_window, wrap=tk.WORD)
-            log_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+            viewer = {
+                'window': log_window,
+                'index': LogIndex(LOG_FILE),
+                'matches': None,
+                'top': 0,
+                'follow': tk.BooleanVar(value=True),
+                'level': tk.StringVar(value="ALL"),
+                'search': tk.StringVar(),
+                'filter_job': 0,
+                'filtering': False,
+                'after_id': None
+            }
+            
+            # Filter bar
+            filter_frame = ttk.Frame(log_window)
+            filter_frame.pack(fill=tk.X, padx=10, pady=(10, 0))
             
-            scrollbar = ttk.Scrollbar(log_text)
+            ttk.Label(filter_frame, text="Level:").pack(side=tk.LEFT)
+            level_combo = ttk.Combobox(filter_frame, textvariable=viewer['level'], 
+                                       values=["ALL"] + LEVELS, state="readonly", width=10)
+            level_combo.pack(side=tk.LEFT, padx=5)
+            level_combo.bind("<<ComboboxSelected>>", lambda e: self.apply_log_filter(viewer))
+            
+            ttk.Label(filter_frame, text="Search:").pack(side=tk.LEFT, padx=(10, 0))
+            search_entry = ttk.Entry(filter_frame, textvariable=viewer['search'], width=25)
+            search_entry.pack(side=tk.LEFT, padx=5)
+            search_entry.bind("<Return>", lambda e: self.apply_log_filter(viewer))
+            
+            ttk.Button(filter_frame, text="Apply", 
+                      command=lambda: self.apply_log_filter(viewer)).pack(side=tk.LEFT)
+            
+            ttk.Checkbutton(filter_frame, text="Follow", 
+                           variable=viewer['follow']).pack(side=tk.RIGHT)
+            
+            # Text area shows one page; the scrollbar spans the whole file
+            text_frame = ttk.Frame(log_window)
+            text_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+            
+            scrollbar = ttk.Scrollbar(text_frame, 
+                                      command=lambda *args: self.scroll_logs(viewer, *args))
             scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
             
-            log_text.config(yscrollcommand=scrollbar.set)
-            scrollbar.config(command=log_text.yview)
+            log_text = tk.Text(text_frame, wrap=tk.NONE)
+            log_text.pack(fill=tk.BOTH, expand=True)
+            
+            x_scrollbar = ttk.Scrollbar(log_window, orient=tk.HORIZONTAL, 
+                                        command=log_text.xview)
+            x_scrollbar.pack(fill=tk.X, padx=10)
+            log_text.config(xscrollcommand=x_scrollbar.set, state=tk.DISABLED)
+            
+            viewer['text'] = log_text
+            viewer['scrollbar'] = scrollbar
+            viewer['line_height'] = tkfont.Font(font=log_text['font']).metrics('linespace')
             
-            with open('weather_app.log', 'r') as f:
-                logs = f.read()
-                log_text.insert(tk.END, logs)
+            def on_wheel(event):
+                if getattr(event, 'num', None) == 4 or event.delta > 0:
+                    self.scroll_logs(viewer, 'scroll', -3, 'units')
+                else:
+                    self.scroll_logs(viewer, 'scroll', 3, 'units')
+                return "break"
             
-            log_text.config(state=tk.DISABLED)
+            log_text.bind("<MouseWheel>", on_wheel)
+            log_text.bind("<Button-4>", on_wheel)
+            log_text.bind("<Button-5>", on_wheel)
+            log_text.bind("<Configure>", lambda e: self.render_logs(viewer))
             
             button_frame = ttk.Frame(log_window)
             button_frame.pack(fill=tk.X, padx=10, pady=10)
             
+            viewer['status'] = ttk.Label(button_frame, text="")
+            viewer['status'].pack(side=tk.LEFT)
+            
             ttk.Button(button_frame, text="Refresh", 
-                      command=lambda: self.refresh_logs(log_text)).pack(side=tk.LEFT)
+                      command=lambda: self.refresh_logs(viewer)).pack(side=tk.LEFT, padx=10)
             
             ttk.Button(button_frame, text="Clear Logs", 
-                      command=lambda: self.clear_logs(log_text)).pack(side=tk.LEFT, padx=10)
+                      command=lambda: self.clear_logs(viewer)).pack(side=tk.LEFT)
+            
+            def close_window():
+                if viewer['after_id']:
+                    self.root.after_cancel(viewer['after_id'])
+                log_window.destroy()
             
             ttk.Button(button_frame, text="Close", 
-                      command=log_window.destroy).pack(side=tk.RIGHT)
+                      command=close_window).pack(side=tk.RIGHT)
+            log_window.protocol("WM_DELETE_WINDOW", close_window)
+            
+            self.refresh_logs(viewer)
             
         except Exception as e:
             messagebox.showerror("Error", f"Could not open log file: {str(e)}")
     
+    def show_performance(self):
+        """Show per-stage latency percentiles"""
+        perf_window = tk.Toplevel(self.root)
+        perf_window.title("Performance")
+        perf_window.geometry("640x420")
+        perf_window.transient(self.root)
+        
+        columns = ("stage", "count", "p50", "p95", "p99", "max")
+        tree = ttk.Treeview(perf_window, columns=columns, show="headings")
+        for column, heading, width in zip(
+                columns, ("Stage", "Count", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Max (ms)"),
+                (180, 70, 90, 90, 90, 90)):
+            tree.heading(column, text=heading)
+            tree.column(column, width=width, anchor=tk.W if column == "stage" else tk.E)
+        tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        button_frame = ttk.Frame(perf_window)
+        button_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        
+        status = ttk.Label(button_frame, text="")
+        status.pack(side=tk.LEFT)
+        
+        state = {'after_id': None}
+        
+        def refresh():
+            if not perf_window.winfo_exists():
+                return
+            snapshot = metrics.snapshot()
+            tree.delete(*tree.get_children())
+            for stage, summary in snapshot.items():
+                tree.insert("", tk.END, values=(
+                    stage, summary['count'], f"{summary['p50_ms']:.1f}",
+                    f"{summary['p95_ms']:.1f}", f"{summary['p99_ms']:.1f}",
+                    f"{summary['max_ms']:.1f}"))
+            status.config(text=f"Since {metrics.started.strftime('%H:%M:%S')}")
+            state['after_id'] = self.root.after(1000, refresh)
+        
+        def reset():
+            metrics.reset()
+            refresh_now()
+        
+        def refresh_now():
+            if state['after_id']:
+                self.root.after_cancel(state['after_id'])
+            refresh()
+        
+        def save():
+            filename = filedialog.asksaveasfilename(
+                parent=perf_window, defaultextension=".json",
+                filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+                title="Save Metrics")
+            if filename:
+                try:
+                    metrics.dump(filename)
+                except OSError as e:
+                    messagebox.showerror("Error", f"Could not save metrics: {str(e)}")
+        
+        def close_window():
+            if state['after_id']:
+                self.root.after_cancel(state['after_id'])
+            perf_window.destroy()
+        
+        ttk.Button(button_frame, text="Reset", command=reset).pack(side=tk.LEFT, padx=10)
+        ttk.Button(button_frame, text="Save...", command=save).pack(side=tk.LEFT)
+        ttk.Button(button_frame, text="Close", command=close_window).pack(side=tk.RIGHT)
+        perf_window.protocol("WM_DELETE_WINDOW", close_window)
+        
+        refresh()
+    
+    def dump_metrics(self):
+        """Write the latency histograms to the configured metrics file, if any"""
+        metrics_file = self.config.get('metrics_file')
+        if not metrics_file:
+            return
+        try:
+            metrics.dump(metrics_file)
+        except OSError as e:
+            logging.error(f"Error writing metrics: {str(e)}")
+    
+    def log_page_size(self, viewer):
+        """Number of log lines that fit in the viewer"""
+        return max(1, viewer['text'].winfo_height() // viewer['line_height'])
+    
+    def log_line_count(self, viewer):
+        """Number of lines matching the current filter"""
+        if viewer['matches'] is not None:
+            return len(viewer['matches'])
+        return len(viewer['index'])
+    
+    def render_logs(self, viewer):
+        """Display the page of log lines starting at viewer['top']"""
+        total = self.log_line_count(viewer)
+        rows = self.log_page_size(viewer)
+        
+        if viewer['follow'].get():
+            viewer['top'] = total - rows
+        viewer['top'] = max(0, min(viewer['top'], total - rows))
+        top = viewer['top']
+        
+        if viewer['matches'] is not None:
+            line_numbers = viewer['matches'][top:top + rows]
+        else:
+            line_numbers = range(top, min(top + rows, total))
+        lines = viewer['index'].get_lines(line_numbers)
+        
+        log_text = viewer['text']
+        log_text.config(state=tk.NORMAL)
+        log_text.delete(1.0, tk.END)
+        log_text.insert(tk.END, "\n".join(lines))
+        log_text.config(state=tk.DISABLED)
+        
+        if total:
+            viewer['scrollbar'].set(top / total, min(1.0, (top + rows) / total))
+            viewer['status'].config(
+                text=f"Lines {top + 1:,}-{top + len(lines):,} of {total:,}")
+        else:
+            viewer['scrollbar'].set(0, 1)
+            viewer['status'].config(text="No log entries")
+    
+    def scroll_logs(self, viewer, *args):
+        """Handle scrollbar and mouse wheel movement over the whole log"""
+        total = self.log_line_count(viewer)
+        rows = self.log_page_size(viewer)
+        
+        if args[0] == 'moveto':
+            viewer['top'] = int(float(args[1]) * total)
+        elif args[0] == 'scroll':
+            step = rows if args[2] == 'pages' else 1
+            viewer['top'] += int(args[1]) * step
+        
+        # Scrolling to the bottom resumes following the tail
+        viewer['follow'].set(viewer['top'] + rows >= total)
+        self.render_logs(viewer)
+    
+    def apply_log_filter(self, viewer):
+        """Filter log lines by minimum level and/or substring (in the background)"""
+        level = viewer['level'].get()
+        viewer['filter_job'] += 1
+        job = viewer['filter_job']
+        viewer['filtering'] = True
+        viewer['status'].config(text="Filtering...")
+        viewer['index'].filter_async(
+            level if level != "ALL" else None, viewer['search'].get(),
+            lambda matches, error: self.root.after(
+                0, lambda: self.show_log_filter(viewer, job, matches, error)))
+    
+    def show_log_filter(self, viewer, job, matches, error):
+        """Display the result of a background log filter unless a newer one started"""
+        if job != viewer['filter_job'] or not viewer['window'].winfo_exists():
+            return
+        viewer['filtering'] = False
+        if error is not None:
+            logging.error(f"Could not filter logs: {str(error)}")
+            viewer['status'].config(text="Filter failed")
+            return
+        viewer['matches'] = matches
+        viewer['top'] = 0
+        self.render_logs(viewer)
+    
     # MISSING METHOD: Refresh Logs
-    def refresh_logs(self, log_text):
-        """Refresh log display"""
+    def refresh_logs(self, viewer):
+        """Index new log lines and refresh the display; repeats while following"""
+        if not viewer['window'].winfo_exists():
+            return
         try:
-            log_text.config(state=tk.NORMAL)
-            log_text.delete(1.0, tk.END)
-            
-            with open('weather_app.log', 'r') as f:
-                logs = f.read()
-                log_text.insert(tk.END, logs)
-            
-            log_text.config(state=tk.DISABLED)
+            # The index must not change while a filter is running
+            if not viewer['filtering'] and viewer['index'].refresh():
+                if viewer['matches'] is not None:
+                    # Only the newly indexed lines are filtered
+                    level = viewer['level'].get()
+                    viewer['matches'] = viewer['index'].extend_filter(
+                        viewer['matches'], level if level != "ALL" else None,
+                        viewer['search'].get())
+                self.render_logs(viewer)
         except Exception as e:
-            messagebox.showerror("Error", f"Could not refresh logs: {str(e)}")
+            logging.error(f"Could not refresh logs: {str(e)}")
+        
+        if viewer['after_id']:
+            self.root.after_cancel(viewer['after_id'])
+        viewer['after_id'] = self.root.after(1000, lambda: self.refresh_logs(viewer))
     
     # MISSING METHOD: Clear Logs
-    def clear_logs(self, log_text):
+    def clear_logs(self, viewer):
         """Clear log file"""
         confirm = messagebox.askyesno("Confirm", "Clear all logs?")
         if confirm:
             try:
-                with open('weather_app.log', 'w') as f:
+                with open(LOG_FILE, 'w') as f:
                     f.write("Logs cleared on " + datetime.now().strftime('%Y-%m-%d %H:%M:%S') + "\n")
                 
-                self.refresh_logs(log_text)
+                self.refresh_logs(viewer)
                 messagebox.showinfo("Logs", "Log file cleared")
             except Exception as e:
                 messagebox.showerror("Error", f"Could not clear logs: {str(e)}")
@@ -404,7 +816,19 @@ class WeatherApp:
             'active_api': 'openweathermap',
             'auto_refresh': False,
             'refresh_interval': 30,
-            'custom_colors': {}
+            'refresh_intervals': {},
+            'refresh_rate_limit': 60,
+            'stale_while_revalidate': True,
+            'startup_snapshot': True,
+            'api_base_url': '',
+            'record_file': '',
+            'metrics_file': '',
+            'custom_colors': {},
+            'cache_ttls': {'current': 600, 'forecast': 3600},
+            'log_format': 'text',
+            'log_max_bytes': 5 * 1024 * 1024,
+            'log_backup_count': 5,
+            'log_rotate_hours': 24
         }
         
         if os.path.exists(self.config_file):
@@ -432,17 +856,21 @@ class WeatherApp:
             self.config['active_api'] = self.active_api.get()
             self.config['last_city'] = self.current_city.get()
             
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=2)
-            logging.info("Configuration saved successfully")
+            # Written later by the config store's background thread
+            self.config_store.save(self.config)
         except Exception as e:
             logging.error(f"Error saving config: {str(e)}")
             messagebox.showerror("Error", f"Could not save configuration: {str(e)}")
     
+    def save_config_now(self):
+        """Save configuration and write it to disk immediately"""
+        self.save_config()
+        self.config_store.flush()
+    
     def show_api_key_prompt(self):
         """Show prompt to enter API key"""
         # Switch to settings tab
-        self.notebook.select(self.settings_tab)
+        self.show_tab(self.settings_tab)
         
         # Create a popup to guide the user
         api_prompt = tk.Toplevel(self.root)
@@ -485,8 +913,7 @@ class WeatherApp:
             key = key_entry.get().strip()
             if key:
                 self.api_key = key
-                self.api_key_entry.delete(0, tk.END)
-                self.api_key_entry.insert(0, key)
+                self.api_key_var.set(key)
                 self.save_config()
                 api_prompt.destroy()
                 messagebox.showinfo("API Key", "API key saved successfully! You can now search for weather.")
@@ -572,18 +999,25 @@ class WeatherApp:
         self.current_weather_tab = ttk.Frame(self.notebook)
         self.forecast_tab = ttk.Frame(self.notebook)
         self.charts_tab = ttk.Frame(self.notebook)
+        self.favorites_tab = ttk.Frame(self.notebook)
         self.settings_tab = ttk.Frame(self.notebook)
         
         self.notebook.add(self.current_weather_tab, text="Current Weather")
         self.notebook.add(self.forecast_tab, text="5-Day Forecast")
         self.notebook.add(self.charts_tab, text="Charts & Trends")
+        self.notebook.add(self.favorites_tab, text="Favorites")
         self.notebook.add(self.settings_tab, text="Settings")
         
-        # Set up each tab
+        # Set up each tab; Charts and Settings are built when first shown
         self.setup_current_weather_tab()
         self.setup_forecast_tab()
-        self.setup_charts_tab()
-        self.setup_settings_tab()
+        self.setup_favorites_tab()
+        self.lazy_tabs = {
+            str(self.charts_tab): self.setup_charts_tab,
+            str(self.settings_tab): self.setup_settings_tab
+        }
+        self.notebook.bind("<<NotebookTabChanged>>", 
+                           lambda e: self.build_tab(self.notebook.select()))
         
         # Status bar
         self.status_bar = ttk.Label(self.root, text="Ready", relief=tk.SUNKEN, anchor=tk.W)
@@ -593,13 +1027,25 @@ class WeatherApp:
         if self.config.get('auto_refresh', False):
             self.setup_auto_refresh()
     
+    def build_tab(self, tab):
+        """Build a deferred tab the first time it is needed"""
+        setup = self.lazy_tabs.pop(str(tab), None)
+        if setup is not None:
+            with span('build.tab'):
+                setup()
+    
+    def show_tab(self, tab):
+        """Select a tab, building it first if it was deferred"""
+        self.build_tab(tab)
+        self.notebook.select(tab)
+    
     def create_menu(self):
         """Create application menu bar"""
         menubar = tk.Menu(self.root)
         
         # File menu
         file_menu = tk.Menu(menubar, tearoff=0)
-        file_menu.add_command(label="Save Configuration", command=self.save_config)
+        file_menu.add_command(label="Save Configuration", command=self.save_config_now)
         file_menu.add_command(label="Export Weather Data", command=self.export_weather_data)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.root.quit)
@@ -609,6 +1055,7 @@ class WeatherApp:
         edit_menu = tk.Menu(menubar, tearoff=0)
         edit_menu.add_command(label="Clear History", command=self.clear_history)
         edit_menu.add_command(label="Manage Favorites", command=self.manage_favorites)
+        edit_menu.add_command(label="Clear Cache", command=self.clear_cache)
         menubar.add_cascade(label="Edit", menu=edit_menu)
         
         # View menu
@@ -626,6 +1073,7 @@ class WeatherApp:
         help_menu = tk.Menu(menubar, tearoff=0)
         help_menu.add_command(label="About", command=self.show_about)
         help_menu.add_command(label="View Logs", command=self.view_logs)
+        help_menu.add_command(label="Performance", command=self.show_performance)
         help_menu.add_command(label="Get API Key Help", command=self.show_api_key_help)
         menubar.add_cascade(label="Help", menu=help_menu)
         
@@ -639,198 +1087,350 @@ class WeatherApp:
     # ... (copy from your previous code)
 
     # Add other required methods
-    def fetch_weather_data(self, city, api_key, api_info):
-        """Fetch weather data from API in a separate thread"""
+    def fetch_and_record(self, city, api_key, api_info):
+        """Fetch and parse weather data, then queue it for the history store
+        
+        Runs on a worker thread. Returns (current, forecast_model, cached),
+        in canonical units whatever units are displayed.
+        """
+        # Current weather and forecast are fetched (and parsed) concurrently
+        with span('fetch.total'):
+            current, forecast_model, cached = self.weather_client.fetch_weather(
+                city, api_key, api_info)
+        
+        # Cached responses are already in the history
+        if not cached:
+            self.history.record(current, forecast_model)
+        
+        return current, forecast_model, cached
+
+    def on_weather_result(self, generation, city, future):
+        """Display a finished weather request unless it has been superseded"""
+        if future.cancelled() or not self.request_manager.is_current(generation):
+            logging.debug(f"Discarding stale weather result for {city}")
+            return
+        
+        stale_saved_at = self.stale_saved_at
+        self.stale_saved_at = None
         try:
-            # Current weather
-            if self.active_api.get() == 'openweathermap':
-                params = {
-                    "q": city,
-                    "appid": api_key,
-                    "units": self.units.get()
-                }
-            
-            current_response = requests.get(api_info['current_url'], params=params, timeout=10)
-            current_response.raise_for_status()
-            current_data = current_response.json()
+            current, forecast_model, cached = future.result()
             
-            # Forecast data
-            forecast_response = requests.get(api_info['forecast_url'], params=params, timeout=10)
-            forecast_response.raise_for_status()
-            forecast_data = forecast_response.json()
-            
-            # Process and display data in the main thread
-            self.root.after(0, lambda: self.process_weather_data(current_data, forecast_data))
+            self.process_weather_data(current, forecast_model)
             
             # Update status
-            self.root.after(0, lambda: self.status_bar.config(
-                text=f"Weather data for {city} updated at {datetime.now().strftime('%H:%M:%S')}"))
+            source = " (cached)" if cached else ""
+            self.status_bar.config(
+                text=f"Weather data for {city} updated at {datetime.now().strftime('%H:%M:%S')}{source}")
             
         except requests.exceptions.RequestException as e:
             logging.error(f"API request error: {str(e)}")
-            self.root.after(0, lambda: self.handle_api_error(str(e)))
+            if stale_saved_at is not None:
+                # Keep showing the saved data instead of interrupting the user
+                age = self.format_age(time.time() - stale_saved_at)
+                self.set_label_text(self.age_label, f"Saved {age} ago - could not refresh")
+                self.status_bar.config(text=f"Showing saved data for {city}: {str(e)}")
+            else:
+                self.handle_api_error(str(e))
         except json.JSONDecodeError as e:
             logging.error(f"JSON parsing error: {str(e)}")
-            self.root.after(0, lambda: self.handle_api_error("Invalid data received from API"))
+            self.handle_api_error("Invalid data received from API")
         except Exception as e:
             logging.error(f"Unexpected error: {str(e)}")
-            self.root.after(0, lambda: self.handle_api_error(f"Unexpected error: {str(e)}"))
+            self.handle_api_error(f"Unexpected error: {str(e)}")
 
-    def process_weather_data(self, current_data, forecast_data):
-        """Process and display weather data"""
-        # Store the data
-        self.current_weather = current_data
-        self.forecast_data = forecast_data
+    def process_weather_data(self, current, forecast_model, saved_at=None):
+        """Display CurrentWeather and ForecastColumns records
+        
+        saved_at is the time saved data was stored when it is shown while a
+        fresh copy is fetched; it is displayed as an age badge.
+        """
+        # Timed for the Performance window
+        with span('render.weather'):
+            # A revalidated forecast is often identical to the one shown
+            forecast_changed = self.forecast_model is None or forecast_model != self.forecast_model
+        
+            # Store the data
+            self.current_weather = current
+            if forecast_changed:
+                self.forecast_model = forecast_model
+        
+            # Update UI based on which API we're using
+            if self.active_api.get() == 'openweathermap':
+                self.process_openweathermap_data(current, self.forecast_model)
         
-        # Update UI based on which API we're using
-        if self.active_api.get() == 'openweathermap':
-            self.process_openweathermap_data(current_data, forecast_data)
+            if saved_at is None:
+                self.set_label_text(self.age_label, "")
+            else:
+                age = self.format_age(time.time() - saved_at)
+                self.set_label_text(self.age_label, f"Saved {age} ago - refreshing...")
         
-        # Update the chart
-        self.update_chart()
+            # Update the chart (history also grows with each new observation)
+            if forecast_changed or self.chart_range.get() == 'history':
+                self.update_chart()
         
-        # Save city to config
-        self.config['last_city'] = self.current_city.get()
-        self.save_config()
+            # Save city to config
+            self.config['last_city'] = self.current_city.get()
+            self.save_config()
         
-        # Update favorite button
-        self.update_favorite_button()
+            # Remember freshly fetched data for the next startup
+            if saved_at is None:
+                self.snapshot_store.save(make_snapshot(
+                    self.current_city.get(), self.active_api.get(), current, self.forecast_model))
+        
+            # Update favorite button
+            self.update_favorite_button()
 
-    def process_openweathermap_data(self, current_data, forecast_data):
+    def process_openweathermap_data(self, current, forecast_model):
         """Process OpenWeatherMap API data"""
         # Current weather tab
-        city_name = f"{current_data['name']}, {current_data['sys']['country']}"
-        self.city_label.config(text=city_name)
-        self.date_label.config(
-            text=f"As of {datetime.fromtimestamp(current_data['dt']).strftime('%Y-%m-%d %H:%M')}")
+        city_name = current.display_name
+        self.set_label_text(self.city_label, city_name)
+        self.set_label_text(
+            self.date_label, f"As of {current.local_time(current.dt).strftime('%Y-%m-%d %H:%M')}")
+        
+        # Records are metric; convert for display
+        units = self.units.get()
+        unit_labels = weather_units.labels(units)
+        unit_symbol = unit_labels['temp']
+        wind_unit = unit_labels['speed']
+        temp, feels_like, temp_min, temp_max = weather_units.temperature(
+            [current.temp, current.feels_like, current.temp_min, current.temp_max], units)
         
         # Temperature and description
-        unit_symbol = "°C" if self.units.get() == "metric" else "°F"
-        self.temp_label.config(text=f"{current_data['main']['temp']:.1f}{unit_symbol}")
-        self.desc_label.config(text=current_data['weather'][0]['description'].capitalize())
+        self.set_label_text(self.temp_label, f"{temp:.1f}{unit_symbol}")
+        self.set_label_text(self.desc_label, current.description.capitalize())
         
         # Load weather icon
-        icon_code = current_data['weather'][0]['icon']
-        self.load_weather_icon(icon_code, self.weather_icon)
+        self.load_weather_icon(current.icon, self.weather_icon)
         
         # Basic info
-        self.basic_info_labels["feels_like"].config(
-            text=f"{current_data['main']['feels_like']:.1f}{unit_symbol}")
-        self.basic_info_labels["humidity"].config(text=f"{current_data['main']['humidity']}%")
+        self.set_label_text(
+            self.basic_info_labels["feels_like"], f"{feels_like:.1f}{unit_symbol}")
+        self.set_label_text(self.basic_info_labels["humidity"], f"{current.humidity}%")
         
-        wind_unit = "m/s" if self.units.get() == "metric" else "mph"
-        self.basic_info_labels["wind"].config(
-            text=f"{current_data['wind']['speed']} {wind_unit}")
+        wind_speed = weather_units.speed(current.wind_speed, units)
+        self.set_label_text(self.basic_info_labels["wind"], f"{wind_speed:.1f} {wind_unit}")
         
-        self.basic_info_labels["pressure"].config(
-            text=f"{current_data['main']['pressure']} hPa")
+        self.set_label_text(self.basic_info_labels["pressure"], f"{current.pressure} hPa")
         
         # Detailed info
-        self.detail_labels["min_temp"].config(
-            text=f"{current_data['main']['temp_min']:.1f}{unit_symbol}")
-        self.detail_labels["max_temp"].config(
-            text=f"{current_data['main']['temp_max']:.1f}{unit_symbol}")
+        self.set_label_text(self.detail_labels["min_temp"], f"{temp_min:.1f}{unit_symbol}")
+        self.set_label_text(self.detail_labels["max_temp"], f"{temp_max:.1f}{unit_symbol}")
         
-        # Convert sunrise/sunset timestamps
-        sunrise = datetime.fromtimestamp(current_data['sys']['sunrise'])
-        sunset = datetime.fromtimestamp(current_data['sys']['sunset'])
+        # Sunrise/sunset in the city's local time, like the forecast
+        sunrise = current.local_time(current.sunrise)
+        sunset = current.local_time(current.sunset)
         
-        self.detail_labels["sunrise"].config(text=sunrise.strftime('%H:%M'))
-        self.detail_labels["sunset"].config(text=sunset.strftime('%H:%M'))
+        self.set_label_text(self.detail_labels["sunrise"], sunrise.strftime('%H:%M'))
+        self.set_label_text(self.detail_labels["sunset"], sunset.strftime('%H:%M'))
         
         # Visibility
-        visibility_km = current_data.get('visibility', 0) / 1000
-        self.detail_labels["visibility"].config(
-            text=f"{visibility_km:.1f} km")
+        visibility = weather_units.distance(current.visibility, units)
+        self.set_label_text(self.detail_labels["visibility"],
+                            f"{visibility:.1f} {unit_labels['distance']}")
         
         # Wind direction
-        wind_direction = self.get_wind_direction(current_data['wind'].get('deg', 0))
-        self.detail_labels["wind_direction"].config(text=wind_direction)
+        wind_direction = self.get_wind_direction(current.wind_deg)
+        self.set_label_text(self.detail_labels["wind_direction"], wind_direction)
         
         # Cloud coverage
-        self.detail_labels["clouds"].config(
-            text=f"{current_data['clouds']['all']}%")
+        self.set_label_text(self.detail_labels["clouds"], f"{current.clouds}%")
         
         # UV Index if available
-        self.detail_labels["uv_index"].config(text="N/A")  # API doesn't provide this
+        self.set_label_text(self.detail_labels["uv_index"], "N/A")  # API doesn't provide this
         
         # Update forecast tab
-        self.forecast_city_label.config(text=f"5-Day Forecast for {city_name}")
-        
-        # Process forecast data
-        forecast_list = forecast_data['list']
-        day_forecasts = {}
-        
-        # Group by day
-        for item in forecast_list:
-            dt = datetime.fromtimestamp(item['dt'])
-            day = dt.strftime('%Y-%m-%d')
-            
-            # Take noon forecast for each day if available
-            if day not in day_forecasts or abs(dt.hour - 12) < abs(datetime.fromtimestamp(day_forecasts[day]['dt']).hour - 12):
-                day_forecasts[day] = item
+        self.set_label_text(self.forecast_city_label, f"5-Day Forecast for {city_name}")
         
-        # Clear previous forecast cards
-        for widget in self.forecast_container.winfo_children():
-            widget.destroy()
+        # Daily aggregates (true min/max across each local day)
+        daily = forecast_model.daily
         
-        # Create new forecast cards
-        sorted_days = sorted(day_forecasts.keys())[:5]  # Limit to 5 days
+        # Update the pooled cards in place
+        self.update_forecast_cards(daily, units)
         
-        for i, day in enumerate(sorted_days):
-            forecast = day_forecasts[day]
-            dt = datetime.fromtimestamp(forecast['dt'])
-            
-            card = ttk.LabelFrame(self.forecast_container, text=dt.strftime('%A'))
-            card.grid(row=0, column=i, padx=5, pady=5, sticky=tk.NSEW)
-            
-            # Date
-            ttk.Label(card, text=dt.strftime('%b %d')).pack(padx=5, pady=2)
-            
-            # Icon
-            icon_label = ttk.Label(card)
-            icon_label.pack(padx=5, pady=2)
-            self.load_weather_icon(forecast['weather'][0]['icon'], icon_label)
-            
-            # Temp min/max
-            temp_text = f"{forecast['main']['temp_max']:.1f}{unit_symbol} / {forecast['main']['temp_min']:.1f}{unit_symbol}"
-            ttk.Label(card, text=temp_text).pack(padx=5, pady=2)
+        # Update charts tab (once it has been built)
+        if self.charts_city_label is not None:
+            self.set_label_text(self.charts_city_label, f"Weather Trends for {city_name}")
+
+    def create_forecast_cards(self, container):
+        """Build the fixed pool of forecast cards (updated in place later)"""
+        cards = []
+        for i in range(FORECAST_DAYS):
+            frame = ttk.LabelFrame(container)
+            frame.grid(row=0, column=i, padx=5, pady=5, sticky=tk.NSEW)
+            container.columnconfigure(i, weight=1)
             
-            # Description
-            ttk.Label(card, text=forecast['weather'][0]['description'].capitalize()).pack(padx=5, pady=2)
+            # Date, icon, temp min/max, description and additional info
+            card = {'frame': frame, 'view': {}}
+            for field in ('date', 'icon', 'temp', 'description', 'humidity', 'wind'):
+                card[field] = ttk.Label(frame)
+                card[field].pack(padx=5, pady=2)
+            cards.append(card)
+        
+        self.forecast_cards = cards
+        for i, card in enumerate(cards):
+            self.apply_card_view(card, self.empty_card_view(i))
+
+    def empty_card_view(self, index):
+        """Placeholder contents of a card with no forecast day"""
+        return {'title': f"Day {index + 1}", 'date': "--", 'icon': None, 'temp': "--",
+                'description': "--", 'humidity': "", 'wind': ""}
+
+    def apply_card_view(self, card, view):
+        """Configure only the parts of a card whose view-model value changed
+
+        The icon is recorded as applied only once its image is shown, so a
+        pending or failed download is retried on the next update.
+        """
+        previous = card['view']
+        applied = dict(view)
+        for field, value in view.items():
+            if previous.get(field, ...) == value:
+                continue
+            if field == 'title':
+                card['frame'].config(text=value)
+            elif field == 'icon':
+                if value is None:
+                    self.wanted_icons[str(card['icon'])] = None
+                    card['icon'].config(image='', text="[Icon]")
+                else:
+                    card['icon'].config(text="")
+                    if not self.load_weather_icon(value, card['icon']):
+                        del applied['icon']
+            else:
+                card[field].config(text=value)
+        card['view'] = applied
+
+    def update_forecast_cards(self, daily, units):
+        """Show the daily aggregates in the forecast card pool"""
+        # Convert the displayed days in one pass
+        count = min(len(daily), len(self.forecast_cards))
+        unit_labels = weather_units.labels(units)
+        unit_symbol = unit_labels['temp']
+        temp_max = weather_units.temperature(daily.temp_max[:count], units)
+        temp_min = weather_units.temperature(daily.temp_min[:count], units)
+        wind_max = weather_units.speed(daily.wind_speed_max[:count], units)
+        
+        for i, card in enumerate(self.forecast_cards):
+            if i >= len(daily):
+                self.apply_card_view(card, self.empty_card_view(i))
+                continue
             
-            # Additional info
-            ttk.Label(card, text=f"Humidity: {forecast['main']['humidity']}%").pack(padx=5, pady=2)
-            ttk.Label(card, text=f"Wind: {forecast['wind']['speed']} {wind_unit}").pack(padx=5, pady=2)
-        
-        # Update charts tab
-        self.charts_city_label.config(text=f"Weather Trends for {city_name}")
+            dt = daily.days[i].item()
+            self.apply_card_view(card, {
+                'title': dt.strftime('%A'),
+                'date': dt.strftime('%b %d'),
+                'icon': daily.icons[i],
+                'temp': f"{temp_max[i]:.1f}{unit_symbol} / {temp_min[i]:.1f}{unit_symbol}",
+                'description': daily.descriptions[i].capitalize(),
+                'humidity': f"Humidity: {daily.humidity_mean[i]:.0f}%",
+                'wind': f"Wind: {wind_max[i]:.1f} {unit_labels['speed']}"
+            })
+
+    def set_label_text(self, widget, text):
+        """Configure a label's text only if it changed (avoids needless relayout)"""
+        if widget.cget('text') != text:
+            widget.config(text=text)
+
+    def format_age(self, seconds):
+        """Describe an age in seconds as e.g. '5 min' or '2 h'"""
+        if seconds < 60:
+            return "<1 min"
+        if seconds < 3600:
+            return f"{int(seconds // 60)} min"
+        if seconds < 86400:
+            return f"{int(seconds // 3600)} h"
+        return f"{int(seconds // 86400)} d"
+
+    def show_saved_weather(self, city):
+        """Render the last saved responses for a city; returns their time or None"""
+        key = self.city_resolver.key(city)
+        current = self.response_cache.get_stale(key, 'current')
+        forecast = self.response_cache.get_stale(key, 'forecast')
+        if current is None or forecast is None:
+            return None
+        
+        saved_at = min(current[1], forecast[1])
+        try:
+            self.process_weather_data(current[0], forecast[0], saved_at=saved_at)
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            logging.error(f"Could not show saved weather for {city}: {str(e)}")
+            return None
+        return saved_at
+
+    def show_snapshot(self, city):
+        """Render the last session's snapshot if it is for this city; returns its time or None"""
+        if not self.config.get('startup_snapshot', True):
+            return None
+        
+        with span('startup.snapshot'):
+            snapshot = load_snapshot(self.snapshot_file)
+            if (snapshot is None or not self.city_resolver.same_city(snapshot['city'], city)
+                    or snapshot['api'] != self.active_api.get()):
+                return None
+            try:
+                self.process_weather_data(snapshot['current'], snapshot['forecast'],
+                                          saved_at=snapshot['saved_at'])
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                logging.error(f"Could not show weather snapshot for {city}: {str(e)}")
+                return None
+        
+        weather_startup.mark("snapshot render")
+        return snapshot['saved_at']
 
     def load_weather_icon(self, icon_code, label_widget):
-        """Load weather icon from API and display"""
+        """Load weather icon from cache or API and display
+
+        Returns True if the icon is shown now, False if it is downloading
+        (or failed).
+        """
+        # Late downloads for an earlier icon must not replace this one
+        self.wanted_icons[str(label_widget)] = icon_code
         try:
+            if icon_code in self.weather_icons:
+                # Use cached icon (unless it is already shown)
+                if str(label_widget.cget('image')) != str(self.weather_icons[icon_code]):
+                    label_widget.config(image=self.weather_icons[icon_code])
+                return True
+            
+            data = self.icon_cache.get_bytes(icon_code)
+            if data is not None:
+                return self.show_weather_icon(icon_code, data, label_widget)
+            
+            # Fetch new icon in the background
             api_info = self.available_apis.get(self.active_api.get())
             icon_url = api_info['icon_url'].format(icon=icon_code)
-            
-            if icon_code in self.weather_icons:
-                # Use cached icon
-                label_widget.config(image=self.weather_icons[icon_code])
-            else:
-                # Fetch new icon
-                response = requests.get(icon_url, timeout=5)
-                response.raise_for_status()
-                
-                image = Image.open(BytesIO(response.content))
-                tk_image = ImageTk.PhotoImage(image)
-                
-                # Cache the icon
-                self.weather_icons[icon_code] = tk_image
-                
-                # Display icon
-                label_widget.config(image=tk_image)
+            label_widget.config(image='', text="[Icon]")
+            self.icon_cache.fetch_async(
+                icon_code, icon_url,
+                lambda data: self.root.after(
+                    0, lambda: self.show_weather_icon(icon_code, data, label_widget)))
+            return False
         except Exception as e:
             logging.error(f"Error loading weather icon: {str(e)}")
-            label_widget.config(image=None, text="[Icon]")
+            label_widget.config(image='', text="[Icon]")
+            return False
+
+    def show_weather_icon(self, icon_code, data, label_widget):
+        """Build a PhotoImage from icon bytes and display it; returns True if shown"""
+        if data is None:
+            return False
+        try:
+            if icon_code not in self.weather_icons:
+                with span('icon.decode'):
+                    # Pillow is imported when the first icon is shown
+                    from PIL import Image, ImageTk
+                    image = Image.open(BytesIO(data))
+                    self.weather_icons[icon_code] = ImageTk.PhotoImage(image)
+            
+            # Skip if the label has moved on to another icon meanwhile
+            if (label_widget.winfo_exists()
+                    and self.wanted_icons.get(str(label_widget)) == icon_code):
+                label_widget.config(image=self.weather_icons[icon_code], text="")
+                return True
+        except Exception as e:
+            logging.error(f"Error displaying weather icon: {str(e)}")
+        return False
 
     def get_wind_direction(self, degrees):
         """Convert wind direction degrees to cardinal direction"""
@@ -842,88 +1442,133 @@ class WeatherApp:
         return directions[index]
 
     def update_chart(self):
-        """Update the weather chart based on selected type"""
-        if not self.forecast_data:
+        """Update the weather chart in place based on selected type"""
+        # Nothing to draw until the Charts tab has been opened
+        if self.chart_canvas is None:
             return
         
-        # Clear previous chart
-        for widget in self.chart_container.winfo_children():
-            widget.destroy()
+        # Draws happen later on idle (see TimedFigureCanvas)
+        with span('render.chart'):
+            self.apply_chart_theme()
         
-        # Get chart type
-        chart_type = self.chart_type.get()
+            if self.forecast_model is None:
+                self.chart_canvas.draw_idle()
+                return
         
-        # Create new figure
-        fig, ax = plt.subplots(figsize=(10, 6), dpi=80)
+            # Get chart type
+            chart_type = self.chart_type.get()
+            units = self.units.get()
+            unit_labels = weather_units.labels(units)
         
-        # Process data based on API
-        if self.active_api.get() == 'openweathermap':
-            # Extract data points
-            dates = []
-            values = []
+            # Process data based on API
+            if self.active_api.get() == 'openweathermap':
+                # Select the data source for this chart
+                if self.chart_range.get() == 'history':
+                    series = self.get_history_series()
+                    dates = series['dates']
+                    suffix = 'History (7 days)'
+                else:
+                    series = self.forecast_model.columns
+                    dates = self.forecast_model.local_dates
+                    suffix = 'Forecast'
             
-            for item in self.forecast_data['list']:
-                dt = datetime.fromtimestamp(item['dt'])
-                dates.append(dt)
-                
                 if chart_type == 'temperature':
-                    values.append(item['main']['temp'])
-                    y_label = 'Temperature (°C)' if self.units.get() == 'metric' else 'Temperature (°F)'
-                    title = 'Temperature Forecast'
+                    values = weather_units.temperature(series['temp'], units)
+                    y_label = f"Temperature ({unit_labels['temp']})"
+                    title = f'Temperature {suffix}'
                 elif chart_type == 'humidity':
-                    values.append(item['main']['humidity'])
+                    values = series['humidity']
                     y_label = 'Humidity (%)'
-                    title = 'Humidity Forecast'
+                    title = f'Humidity {suffix}'
                 elif chart_type == 'pressure':
-                    values.append(item['main']['pressure'])
+                    values = series['pressure']
                     y_label = 'Pressure (hPa)'
-                    title = 'Pressure Forecast'
+                    title = f'Pressure {suffix}'
                 elif chart_type == 'wind_speed':
-                    values.append(item['wind']['speed'])
-                    y_label = 'Wind Speed (m/s)' if self.units.get() == 'metric' else 'Wind Speed (mph)'
-                    title = 'Wind Speed Forecast'
+                    values = weather_units.speed(series['wind_speed'], units)
+                    y_label = f"Wind Speed ({unit_labels['speed']})"
+                    title = f'Wind Speed {suffix}'
             
-            # Plot data
-            ax.plot(dates, values, marker='o', linestyle='-', color=self.accent_color)
+                ax = self.chart_ax
+                if self.chart_line is None:
+                    # First plot sets up the date axis; later updates reuse the line
+                    self.chart_placeholder.set_visible(False)
+                    ax.set_axis_on()
+                    self.chart_line, = ax.plot(dates, values, marker='o', linestyle='-')
+                    ax.set_xlabel('Date')
+                    self.chart_figure.autofmt_xdate()
+                else:
+                    self.chart_line.set_data(dates, values)
             
-            # Configure plot
-            ax.set_title(title)
-            ax.set_xlabel('Date')
-            ax.set_ylabel(y_label)
+                self.chart_line.set_color(self.accent_color)
+                ax.set_title(title)
+                ax.set_ylabel(y_label)
             
-            # Format x-axis to show readable dates
-            fig.autofmt_xdate()
+                # Rescale to the new data
+                ax.relim()
+                ax.autoscale_view()
             
-            # Apply theme colors
-            if self.theme.get() == 'dark':
-                fig.patch.set_facecolor(self.bg_color)
-                ax.set_facecolor(self.highlight_color)
-                ax.tick_params(colors=self.fg_color)
-                ax.xaxis.label.set_color(self.fg_color)
-                ax.yaxis.label.set_color(self.fg_color)
-                ax.title.set_color(self.fg_color)
-            
-            # Create canvas
-            canvas = FigureCanvasTkAgg(fig, master=self.chart_container)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+                self.chart_canvas.draw_idle()
+
+    def get_history_series(self, days=7):
+        """Load the current city's stored observations for the history chart"""
+        city_id = self.current_weather.city_id
+        now = datetime.now().timestamp()
+        series = self.history.query(city_id, now - days * 86400, now)
+        
+        utc_offset = self.current_weather.utc_offset
+        series['dates'] = (series['dt'] + utc_offset).astype('datetime64[s]')
+        return series
 
     def create_empty_chart(self):
-        """Create an empty chart with a message"""
-        fig, ax = plt.subplots(figsize=(10, 6), dpi=80)
-        ax.text(0.5, 0.5, 'Search for a city to view weather charts', 
-               horizontalalignment='center', verticalalignment='center',
-               transform=ax.transAxes, fontsize=14)
-        ax.set_axis_off()
-        
-        # Apply theme colors
-        if self.theme.get() == 'dark':
-            fig.patch.set_facecolor(self.bg_color)
-            ax.set_facecolor(self.bg_color)
+        """Create the persistent chart figure with a placeholder message"""
+        # Matplotlib is imported only when the Charts tab is first shown
+        with span('import.matplotlib'):
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
+        class TimedFigureCanvas(FigureCanvasTkAgg):
+            """Tk chart canvas that records how long each (idle) draw takes"""
+            
+            def draw(self):
+                with span('render.chart_draw'):
+                    super().draw()
+        
+        self.chart_figure = Figure(figsize=(10, 6), dpi=80)
+        self.chart_ax = self.chart_figure.add_subplot(111)
+        self.chart_line = None
         
-        canvas = FigureCanvasTkAgg(fig, master=self.chart_container)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.chart_placeholder = self.chart_ax.text(
+            0.5, 0.5, 'Search for a city to view weather charts', 
+            horizontalalignment='center', verticalalignment='center',
+            transform=self.chart_ax.transAxes, fontsize=14)
+        self.chart_ax.set_axis_off()
+        
+        self.chart_canvas = TimedFigureCanvas(self.chart_figure, master=self.chart_container)
+        self.chart_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        
+        self.apply_chart_theme()
+        self.chart_canvas.draw_idle()
+
+    def apply_chart_theme(self):
+        """Apply theme colors to the chart figure"""
+        if self.theme.get() == 'dark':
+            face_color = self.bg_color
+            axes_color = self.highlight_color if self.chart_line is not None else self.bg_color
+            text_color = self.fg_color
+        else:
+            face_color = 'white'
+            axes_color = 'white'
+            text_color = 'black'
+        
+        ax = self.chart_ax
+        self.chart_figure.patch.set_facecolor(face_color)
+        ax.set_facecolor(axes_color)
+        ax.tick_params(colors=text_color)
+        ax.xaxis.label.set_color(text_color)
+        ax.yaxis.label.set_color(text_color)
+        ax.title.set_color(text_color)
+        self.chart_placeholder.set_color(text_color)
 
     def toggle_favorite(self):
         """Add or remove current city from favorites"""
@@ -931,20 +1576,31 @@ class WeatherApp:
         if not city:
             return
         
-        if city in self.favorite_cities:
-            self.favorite_cities.remove(city)
-            messagebox.showinfo("Favorites", f"{city} removed from favorites")
+        favorite = self.find_favorite(city)
+        if favorite is not None:
+            self.favorite_cities.remove(favorite)
+            messagebox.showinfo("Favorites", f"{favorite} removed from favorites")
         else:
             self.favorite_cities.append(city)
             messagebox.showinfo("Favorites", f"{city} added to favorites")
         
         self.update_favorite_button()
         self.save_config()
+        self.setup_auto_refresh()
+
+    def find_favorite(self, city):
+        """Return the favorite naming the same place as city (any spelling), or None"""
+        if not city:
+            return None
+        for favorite in self.favorite_cities:
+            if self.city_resolver.same_city(favorite, city):
+                return favorite
+        return None
 
     def update_favorite_button(self):
         """Update favorite button state based on current city"""
         city = self.current_city.get()
-        if city in self.favorite_cities:
+        if self.find_favorite(city) is not None:
             self.fav_btn.config(text="♥ Remove from Favorites")
         else:
             self.fav_btn.config(text="♡ Add to Favorites")
@@ -956,7 +1612,7 @@ class WeatherApp:
             self.root.update_idletasks()
             
             # Call IP geolocation API
-            response = requests.get("https://ipapi.co/json/", timeout=5)
+            response = get_session().get("https://ipapi.co/json/", timeout=5)
             response.raise_for_status()
             location_data = response.json()
             
@@ -1004,24 +1660,67 @@ class WeatherApp:
         else:
             self.config['auto_refresh'] = False
             self.save_config()
+            self.setup_auto_refresh()
             messagebox.showinfo("Auto-refresh", "Auto-refresh disabled")
 
     def setup_auto_refresh(self):
-        """Set up auto-refresh timer"""
-        if hasattr(self, 'refresh_timer_id'):
-            self.root.after_cancel(self.refresh_timer_id)
+        """Schedule auto-refresh of the current city and all favorites"""
+        intervals = {}
+        delays = {}
+        api_key = self.api_key or self.api_key_var.get().strip()
+        api_info = self.available_apis.get(self.active_api.get())
+        
+        if self.auto_refresh_var.get() and api_key and api_info:
+            # Snapshot taken on the UI thread for the refresh workers
+            self.refresh_params = (api_key, api_info)
+            
+            try:
+                default = max(int(self.refresh_interval.get()), 5)
+            except ValueError:
+                default = 30
+            # Per-city overrides (minutes) from the configuration
+            overrides = self.config.get('refresh_intervals', {})
+            
+            for city in self.favorite_cities:
+                minutes = max(int(overrides.get(city, default)), 5)
+                intervals[city] = minutes * 60
+            
+            # The current city was just fetched, so wait a full interval
+            # (a favorite spelled differently is the same city)
+            city = self.find_favorite(self.current_city.get()) or self.current_city.get()
+            if city:
+                minutes = max(int(overrides.get(city, default)), 5)
+                intervals.setdefault(city, minutes * 60)
+                delays[city] = intervals[city]
         
-        if self.auto_refresh_var.get() and self.current_city.get():
-            interval_ms = int(self.refresh_interval.get()) * 60 * 1000
-            self.refresh_timer_id = self.root.after(interval_ms, self.auto_refresh)
+        self.refresh_scheduler.sync(intervals, delays)
 
-    def auto_refresh(self):
-        """Auto-refresh weather data"""
-        if self.current_city.get():
-            self.get_weather()
+    def fetch_scheduled(self, city):
+        """Fetch one city for the refresh scheduler (worker thread)"""
+        api_key, api_info = self.refresh_params
+        return self.fetch_and_record(city, api_key, api_info)
+
+    def on_scheduled_refresh(self, city, result, error):
+        """Show a scheduled refresh in the main view and/or the dashboard"""
+        if error is not None:
+            logging.error(f"Auto-refresh of {city} failed: {str(error)}")
+            status = getattr(getattr(error, 'response', None), 'status_code', None)
+            if status == 429:
+                self.status_bar.config(text="Rate limit reached - auto-refresh paused")
+            return
         
-        # Schedule next refresh
-        self.setup_auto_refresh()
+        current, forecast_model, cached = result
+        
+        if self.city_resolver.same_city(city, self.current_city.get()):
+            self.process_weather_data(current, forecast_model)
+            self.status_bar.config(
+                text=f"Weather data for {city} refreshed at {datetime.now().strftime('%H:%M:%S')}")
+        
+        if city in self.favorite_cities:
+            if not self.dashboard_tree.exists(city):
+                self.dashboard_tree.insert("", tk.END, iid=city, 
+                                           values=(city, "...", "", "", "", ""))
+            self.fill_dashboard_row(city, current)
 
     def setup_current_weather_tab(self):
         """Set up the current weather tab UI"""
@@ -1057,7 +1756,7 @@ class WeatherApp:
             api_warning.pack(fill=tk.X, padx=10, pady=5)
             
             settings_btn = ttk.Button(self.current_weather_tab, text="Go to Settings", 
-                                    command=lambda: self.notebook.select(self.settings_tab))
+                                    command=lambda: self.show_tab(self.settings_tab))
             settings_btn.pack(pady=5)
         
         # Main container for weather info
@@ -1078,6 +1777,10 @@ class WeatherApp:
         self.date_label = ttk.Label(header_frame, text="--", font=("Arial", 12))
         self.date_label.grid(row=1, column=0, sticky=tk.W)
         
+        # Age badge shown while saved data is being revalidated
+        self.age_label = ttk.Label(header_frame, text="", font=("Arial", 10, "italic"))
+        self.age_label.grid(row=2, column=0, sticky=tk.W)
+        
         # Weather icon and main info
         main_info_frame = ttk.Frame(self.current_weather_frame)
         main_info_frame.pack(fill=tk.X, padx=10, pady=10)
@@ -1153,26 +1856,8 @@ class WeatherApp:
         self.forecast_container = ttk.Frame(self.forecast_tab)
         self.forecast_container.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        # Create placeholder for forecast cards
-        for i in range(5):
-            card = ttk.LabelFrame(self.forecast_container, text=f"Day {i+1}")
-            card.grid(row=0, column=i, padx=5, pady=5, sticky=tk.NSEW)
-            
-            # Date
-            ttk.Label(card, text="--").pack(padx=5, pady=2)
-            
-            # Icon placeholder
-            ttk.Label(card, text="[Icon]").pack(padx=5, pady=2)
-            
-            # Temp
-            ttk.Label(card, text="--").pack(padx=5, pady=2)
-            
-            # Description
-            ttk.Label(card, text="--").pack(padx=5, pady=2)
-        
-        # Configure grid
-        for i in range(5):
-            self.forecast_container.columnconfigure(i, weight=1)
+        # Forecast cards are created once and reused for every update
+        self.create_forecast_cards(self.forecast_container)
 
     def setup_charts_tab(self):
         """Set up the charts tab UI"""
@@ -1190,7 +1875,6 @@ class WeatherApp:
         
         ttk.Label(chart_selection_frame, text="Select Chart:").pack(side=tk.LEFT, padx=5)
         
-        self.chart_type = tk.StringVar(value="temperature")
         charts = [
             ("Temperature", "temperature"),
             ("Humidity", "humidity"),
@@ -1202,12 +1886,160 @@ class WeatherApp:
             ttk.Radiobutton(chart_selection_frame, text=text, variable=self.chart_type, 
                            value=value, command=self.update_chart).pack(side=tk.LEFT, padx=10)
         
+        # Forecast or stored history
+        range_combo = ttk.Combobox(chart_selection_frame, textvariable=self.chart_range, 
+                                   values=["forecast", "history"], state="readonly", width=10)
+        range_combo.pack(side=tk.RIGHT, padx=5)
+        range_combo.bind("<<ComboboxSelected>>", lambda e: self.update_chart())
+        ttk.Label(chart_selection_frame, text="Range:").pack(side=tk.RIGHT)
+        
         # Chart container
         self.chart_container = ttk.Frame(self.charts_tab)
         self.chart_container.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
         # Initial empty chart
         self.create_empty_chart()
+        
+        # Show data loaded before the tab was first opened
+        if self.current_weather is not None:
+            self.charts_city_label.config(
+                text=f"Weather Trends for {self.current_weather.display_name}")
+            self.update_chart()
+
+    def setup_favorites_tab(self):
+        """Set up the favorites dashboard tab UI"""
+        # Header frame
+        header_frame = ttk.Frame(self.favorites_tab)
+        header_frame.pack(fill=tk.X, padx=10, pady=10)
+        
+        ttk.Label(header_frame, text="Favorites Dashboard", 
+                 font=("Arial", 16, "bold")).pack(side=tk.LEFT)
+        
+        self.dashboard_refresh_btn = ttk.Button(header_frame, text="Refresh All", 
+                                                command=self.refresh_dashboard)
+        self.dashboard_refresh_btn.pack(side=tk.RIGHT, padx=5)
+        
+        self.dashboard_status = ttk.Label(header_frame, text="")
+        self.dashboard_status.pack(side=tk.RIGHT, padx=10)
+        
+        # Summary grid
+        grid_frame = ttk.Frame(self.favorites_tab)
+        grid_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        columns = [
+            ("city", "City", 180),
+            ("temp", "Temperature", 100),
+            ("description", "Conditions", 160),
+            ("humidity", "Humidity", 80),
+            ("wind", "Wind", 90),
+            ("updated", "Updated", 80)
+        ]
+        
+        self.dashboard_tree = ttk.Treeview(grid_frame, columns=[c[0] for c in columns], 
+                                           show="headings")
+        for key, text, width in columns:
+            self.dashboard_tree.heading(key, text=text)
+            self.dashboard_tree.column(key, width=width, anchor=tk.W)
+        
+        scrollbar = ttk.Scrollbar(grid_frame, command=self.dashboard_tree.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.dashboard_tree.config(yscrollcommand=scrollbar.set)
+        self.dashboard_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        # Double-click opens the city in the main view
+        self.dashboard_tree.bind("<Double-1>", self.on_dashboard_select)
+        
+        # Bounded worker pool for bulk refreshes
+        self.dashboard_executor = ThreadPoolExecutor(max_workers=8, 
+                                                     thread_name_prefix='dashboard')
+        self.dashboard_generation = 0
+        self.dashboard_total = 0
+        self.dashboard_pending = 0
+
+    def refresh_dashboard(self):
+        """Refresh every favorite city concurrently"""
+        if not self.favorite_cities:
+            self.dashboard_status.config(text="No favorite cities")
+            return
+        
+        api_key = self.api_key or self.api_key_var.get().strip()
+        api_info = self.available_apis.get(self.active_api.get())
+        if not api_key or not api_info:
+            messagebox.showerror("Error", "Please enter your API key in Settings tab")
+            return
+        
+        # Results from an earlier refresh are ignored once a new one starts
+        self.dashboard_generation += 1
+        generation = self.dashboard_generation
+        
+        cities = list(dict.fromkeys(self.favorite_cities))
+        
+        self.dashboard_tree.delete(*self.dashboard_tree.get_children())
+        self.dashboard_rows.clear()
+        for city in cities:
+            self.dashboard_tree.insert("", tk.END, iid=city, 
+                                       values=(city, "...", "", "", "", ""))
+        
+        self.dashboard_total = len(cities)
+        self.dashboard_pending = len(cities)
+        self.dashboard_status.config(text=f"Refreshing 0/{self.dashboard_total}...")
+        self.dashboard_refresh_btn.config(state=tk.DISABLED)
+        
+        for city in cities:
+            future = self.dashboard_executor.submit(
+                self.fetch_and_record, city, api_key, api_info)
+            future.add_done_callback(
+                lambda f, city=city: self.root.after(
+                    0, lambda: self.update_dashboard_row(generation, city, f)))
+
+    def update_dashboard_row(self, generation, city, future):
+        """Fill in one dashboard row as its result arrives"""
+        if generation != self.dashboard_generation or not self.dashboard_tree.exists(city):
+            return
+        
+        try:
+            self.fill_dashboard_row(city, future.result()[0])
+        except Exception as e:
+            logging.error(f"Error refreshing favorite {city}: {str(e)}")
+            self.dashboard_tree.item(city, values=(city, "Error", str(e)[:60], "", "", ""))
+        
+        self.dashboard_pending -= 1
+        done = self.dashboard_total - self.dashboard_pending
+        if self.dashboard_pending > 0:
+            self.dashboard_status.config(text=f"Refreshing {done}/{self.dashboard_total}...")
+        else:
+            self.dashboard_status.config(
+                text=f"Updated at {datetime.now().strftime('%H:%M:%S')}")
+            self.dashboard_refresh_btn.config(state=tk.NORMAL)
+
+    def fill_dashboard_row(self, city, current, updated=None):
+        """Show current conditions in a dashboard row (kept for unit changes)"""
+        if updated is None:
+            updated = datetime.now().strftime('%H:%M')
+        self.dashboard_rows[city] = (current, updated)
+        
+        units = self.units.get()
+        unit_labels = weather_units.labels(units)
+        self.dashboard_tree.item(city, values=(
+            current.display_name,
+            f"{weather_units.temperature(current.temp, units):.1f}{unit_labels['temp']}",
+            current.description.capitalize(),
+            f"{current.humidity}%",
+            f"{weather_units.speed(current.wind_speed, units):.1f} {unit_labels['speed']}",
+            updated
+        ))
+
+    def on_dashboard_select(self, event):
+        """Show the double-clicked favorite in the main view"""
+        selected = self.dashboard_tree.focus()
+        if not selected:
+            return
+        
+        self.city_entry.delete(0, tk.END)
+        self.city_entry.insert(0, selected)
+        self.current_city.set(selected)
+        self.notebook.select(self.current_weather_tab)
+        self.get_weather()
 
     def setup_settings_tab(self):
         """Set up the settings tab UI"""
@@ -1244,9 +2076,7 @@ class WeatherApp:
         ttk.Label(api_key_frame, text="API Key:").grid(
             row=0, column=0, sticky=tk.W, padx=5, pady=5)
         
-        self.api_key_entry = ttk.Entry(api_key_frame, width=40)
-        if self.api_key:
-            self.api_key_entry.insert(0, self.api_key)
+        self.api_key_entry = ttk.Entry(api_key_frame, width=40, textvariable=self.api_key_var)
         self.api_key_entry.grid(row=0, column=1, padx=5, pady=5)
         
         api_key_buttons = ttk.Frame(api_key_frame)
@@ -1255,7 +2085,6 @@ class WeatherApp:
         ttk.Button(api_key_buttons, text="Save Key", 
                   command=self.save_api_key).pack(side=tk.LEFT, padx=2)
         
-        self.show_key_var = tk.BooleanVar(value=False)
         ttk.Checkbutton(api_key_buttons, text="Show Key", 
                        variable=self.show_key_var, 
                        command=self.toggle_show_key).pack(side=tk.LEFT, padx=10)
@@ -1276,11 +2105,13 @@ class WeatherApp:
             row=0, column=0, sticky=tk.W, padx=5, pady=5)
         
         ttk.Radiobutton(units_frame, text="Celsius (°C)", 
-                       variable=self.units, value="metric").grid(
+                       variable=self.units, value="metric",
+                       command=self.change_units).grid(
                            row=0, column=1, padx=5, pady=5)
         
         ttk.Radiobutton(units_frame, text="Fahrenheit (°F)", 
-                       variable=self.units, value="imperial").grid(
+                       variable=self.units, value="imperial",
+                       command=self.change_units).grid(
                            row=0, column=2, padx=5, pady=5)
         
         # Auto-refresh settings
@@ -1290,7 +2121,6 @@ class WeatherApp:
         ttk.Label(refresh_frame, text="Auto-refresh:").grid(
             row=0, column=0, sticky=tk.W, padx=5, pady=5)
         
-        self.auto_refresh_var = tk.BooleanVar(value=self.config.get('auto_refresh', False))
         ttk.Checkbutton(refresh_frame, text="Enable", 
                        variable=self.auto_refresh_var,
                        command=self.toggle_auto_refresh).grid(
@@ -1299,14 +2129,13 @@ class WeatherApp:
         ttk.Label(refresh_frame, text="Refresh interval (minutes):").grid(
             row=1, column=0, sticky=tk.W, padx=5, pady=5)
         
-        self.refresh_interval = tk.StringVar(value=str(self.config.get('refresh_interval', 30)))
         interval_spin = ttk.Spinbox(refresh_frame, from_=5, to=120, 
                                    textvariable=self.refresh_interval, width=5)
         interval_spin.grid(row=1, column=1, sticky=tk.W, padx=5, pady=5)
     
     def test_api_key(self):
         """Test if the current API key works"""
-        api_key = self.api_key_entry.get().strip()
+        api_key = self.api_key_var.get().strip()
         
         if not api_key:
             messagebox.showerror("Error", "Please enter an API key")
@@ -1324,7 +2153,7 @@ class WeatherApp:
             }
             
             api_info = self.available_apis[self.active_api.get()]
-            response = requests.get(api_info['current_url'], params=params, timeout=10)
+            response = get_session().get(api_info['current_url'], params=params, timeout=10)
             
             if response.status_code == 200:
                 self.api_key = api_key
@@ -1340,8 +2169,12 @@ class WeatherApp:
             messagebox.showerror("Error", f"Could not connect to weather service: {str(e)}")
             self.status_bar.config(text="API key test failed - connection error")
     
-    def get_weather(self):
-        """Fetch current weather and forecast data"""
+    def get_weather(self, saved_at=None):
+        """Fetch current weather and forecast data
+        
+        saved_at is the time of saved data for this city that is already on
+        screen (the startup snapshot); otherwise the response cache is used.
+        """
         city = self.city_entry.get().strip()
         if not city:
             messagebox.showerror("Error", "Please enter a city name")
@@ -1351,8 +2184,8 @@ class WeatherApp:
         self.status_bar.config(text=f"Fetching weather data for {city}...")
         self.root.update_idletasks()
         
-        # Add to search history if not already there
-        if city not in self.search_history:
+        # Add to search history if not already there (under any spelling)
+        if not any(self.city_resolver.same_city(city, entry) for entry in self.search_history):
             self.search_history.append(city)
             self.city_entry['values'] = self.search_history
         
@@ -1360,9 +2193,9 @@ class WeatherApp:
         self.current_city.set(city)
         
         # Check API key
-        api_key = self.api_key or self.api_key_entry.get().strip()
+        api_key = self.api_key or self.api_key_var.get().strip()
         if not api_key:
-            self.notebook.select(self.settings_tab)
+            self.show_tab(self.settings_tab)
             messagebox.showerror("Error", "Please enter your API key in Settings tab")
             self.status_bar.config(text="Error: No API key provided")
             return
@@ -1374,14 +2207,27 @@ class WeatherApp:
             self.status_bar.config(text="Error: Invalid API selection")
             return
         
-        # Start data fetching in a separate thread to keep UI responsive
-        threading.Thread(target=self.fetch_weather_data, 
-                        args=(city, api_key, api_info), 
-                        daemon=True).start()
+        # Show the last saved data right away while revalidating
+        self.stale_saved_at = saved_at
+        if saved_at is None and self.config.get('stale_while_revalidate', True):
+            self.stale_saved_at = self.show_saved_weather(city)
+        if self.stale_saved_at is not None:
+            self.status_bar.config(text=f"Showing saved data for {city}, refreshing...")
+        
+        # Fetch on the request pool; repeated requests for the same city
+        # share one fetch and only the latest request is displayed
+        key = (self.city_resolver.key(city), self.active_api.get())
+        generation, future = self.request_manager.submit(
+            key, self.fetch_and_record, city, api_key, api_info)
+        future.add_done_callback(
+            lambda f: self.root.after(0, lambda: self.on_weather_result(generation, city, f)))
+        
+        # Restart the auto-refresh timer for the new city
+        self.setup_auto_refresh()
     
     def save_api_key(self):
         """Save API key to configuration"""
-        api_key = self.api_key_entry.get().strip()
+        api_key = self.api_key_var.get().strip()
         if api_key:
             self.api_key = api_key
             self.save_config()
@@ -1392,6 +2238,18 @@ class WeatherApp:
         else:
             messagebox.showerror("Error", "Please enter a valid API key")
     
+    def shutdown(self):
+        """Flush background writers before exit"""
+        self.dump_metrics()
+        self.config_store.close()
+        self.snapshot_store.close()
+        self.city_resolver.close()
+        self.request_manager.shutdown()
+        self.refresh_scheduler.stop()
+        self.history.close()
+        self.weather_client.shutdown()
+        self.log_listener.stop()
+    
     def toggle_show_key(self):
         """Toggle showing/hiding API key"""
         if self.show_key_var.get():
@@ -1400,9 +2258,14 @@ class WeatherApp:
             self.api_key_entry.config(show="*")
 
 def main():
+    weather_startup.mark("imports")
     root = tk.Tk()
+    weather_startup.mark("Tk root")
     app = WeatherApp(root)
+    weather_startup.mark("app init")
+    weather_startup.report_after_paint(root)
     root.mainloop()
+    app.shutdown()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
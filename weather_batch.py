@@ -0,0 +1,179 @@
+"""Headless batch mode: fetch weather for many cities and stream the results
+
+Usage:
+    python main.py batch --cities-file cities.txt --format csv --output out.csv
+    python weather_batch.py --cities-file cities.txt --format jsonl
+
+This module must not import tkinter, PIL or matplotlib.
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from weather_cache import ResponseCache
+from weather_cities import CityResolver
+from weather_client import WeatherClient, AVAILABLE_APIS, resolve_apis, enable_recording
+from weather_export import CURRENT_HEADER, current_row, json_record
+from weather_metrics import metrics
+
+DEFAULT_CONFIG_FILE = "weather_config.json"
+
+
+def read_cities(path):
+    """Yield city names from a file, one per line (blank lines and # comments skipped)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            city = line.strip()
+            if city and not city.startswith('#'):
+                yield city
+
+
+def load_api_key(config_file):
+    """Read the API key from the environment or the app's config file"""
+    api_key = os.environ.get('OWM_API_KEY', '')
+    if api_key:
+        return api_key
+    try:
+        with open(config_file, 'r') as f:
+            return json.load(f).get('api_key', '')
+    except (OSError, ValueError):
+        return ''
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="main.py batch",
+        description="Fetch weather for a list of cities without starting the GUI")
+    parser.add_argument('--cities-file', required=True,
+                        help="text file with one city per line")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv',
+                        help="output format (default: csv)")
+    parser.add_argument('--output', default='-',
+                        help="output file (default: stdout)")
+    parser.add_argument('--units', choices=['metric', 'imperial'], default='metric',
+                        help="units of the output; data is fetched and cached in metric")
+    parser.add_argument('--api', choices=sorted(AVAILABLE_APIS), default='openweathermap')
+    parser.add_argument('--api-key', default=None,
+                        help="API key (default: $OWM_API_KEY or the config file)")
+    parser.add_argument('--config', default=DEFAULT_CONFIG_FILE,
+                        help="config file to read the API key from")
+    parser.add_argument('--workers', type=int, default=16,
+                        help="number of cities fetched concurrently (default: 16)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="always query the API instead of the response cache")
+    parser.add_argument('--base-url', default=None,
+                        help="send API requests to this base URL, e.g. the local mock "
+                             "server (default: $OWM_BASE_URL)")
+    parser.add_argument('--metrics', default=None,
+                        help="write per-stage latency percentiles to this JSON file")
+    parser.add_argument('--record', default=None,
+                        help="append API responses to this JSONL archive (default: $OWM_RECORD)")
+    return parser.parse_args(argv)
+
+
+def run_batch(cities, client, api_key, api_info, workers, on_result):
+    """Fetch cities concurrently, calling on_result(city, current, forecast, error)
+
+    At most ``workers * 2`` cities are in flight at once, so memory stays
+    flat regardless of how many cities are read from the input.
+    """
+    max_in_flight = workers * 2
+    in_flight = {}
+    cities = iter(cities)
+    exhausted = False
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch') as executor:
+        while True:
+            while not exhausted and len(in_flight) < max_in_flight:
+                city = next(cities, None)
+                if city is None:
+                    exhausted = True
+                    break
+                future = executor.submit(client.fetch_weather, city, api_key, api_info)
+                in_flight[future] = city
+
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                city = in_flight.pop(future)
+                try:
+                    current, forecast, _ = future.result()
+                except Exception as e:
+                    on_result(city, None, None, e)
+                else:
+                    on_result(city, current, forecast, None)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    api_key = args.api_key or load_api_key(args.config)
+    if not api_key:
+        logging.error("No API key: pass --api-key, set OWM_API_KEY or save one in the app")
+        return 2
+
+    cache = None
+    resolver = CityResolver()
+    if not args.no_cache:
+        data_dir = os.path.dirname(os.path.abspath(args.config))
+        cache = ResponseCache(os.path.join(data_dir, 'weather_cache'))
+        # Share the app's city resolutions, so cache entries are shared too
+        resolver = CityResolver(os.path.join(data_dir, 'weather_cities.json'))
+    client = WeatherClient(cache=cache, max_workers=args.workers * 2, resolver=resolver)
+    enable_recording(args.record)
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', newline='', encoding='utf-8')
+    counts = {'ok': 0, 'failed': 0}
+    started = time.perf_counter()
+
+    try:
+        if args.format == 'csv':
+            writer = csv.writer(out)
+            writer.writerow(['Query'] + CURRENT_HEADER)
+
+        def on_result(city, current, forecast, error):
+            if error is not None:
+                counts['failed'] += 1
+                # Responses are parsed into records by the client
+                if isinstance(error, (KeyError, IndexError, TypeError)):
+                    logging.error(f"{city}: unexpected response format: {str(error)}")
+                else:
+                    logging.error(f"{city}: {str(error)}")
+                return
+
+            if args.format == 'csv':
+                writer.writerow([city] + current_row(current, args.units))
+            else:
+                out.write(json.dumps(json_record(city, current, forecast, args.units)))
+                out.write("\n")
+            counts['ok'] += 1
+
+        run_batch(read_cities(args.cities_file), client, api_key,
+                  resolve_apis(args.base_url)[args.api], args.workers, on_result)
+    finally:
+        client.shutdown()
+        resolver.close()
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    logging.info(f"Fetched {counts['ok']} cities ({counts['failed']} failed) in {elapsed:.1f}s")
+    if args.metrics:
+        try:
+            metrics.dump(args.metrics)
+        except OSError as e:
+            logging.error(f"Error writing metrics: {str(e)}")
+    return 1 if counts['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
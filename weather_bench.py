@@ -0,0 +1,476 @@
+"""Benchmarks for the fetch -> process -> render pipeline
+
+Usage:
+    python weather_bench.py                          # run and print results
+    python weather_bench.py --save bench_baseline.json
+    python weather_bench.py --compare bench_baseline.json
+
+Payloads are synthesized (see weather_mock.py), and fetches go to an
+in-process mock server, so no network or API key is needed. Rendering
+uses a hidden Tk root when a display is available and stub widgets
+otherwise; charts are drawn with the Agg backend either way.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+# Fixed clock so every run benchmarks identical payloads
+NOW = 1700000000
+
+DEFAULT_SLOTS = [40, 400, 4000]
+DEFAULT_CITIES = [1, 10, 100]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def forecast_payload(city, slots):
+    """Synthetic OWM forecast response with the given number of 3-hour slots"""
+    from weather_mock import synthesize
+
+    payload = synthesize('forecast', city, 'metric', NOW)
+    items = []
+    t = NOW
+    while len(items) < slots:
+        items.extend(synthesize('forecast', city, 'metric', t)['list'])
+        t += 40 * 10800
+    payload['list'] = items[:slots]
+    payload['cnt'] = slots
+    return payload
+
+
+def current_record(city):
+    from weather_mock import synthesize
+    from weather_model import CurrentWeather
+    return CurrentWeather.from_owm(synthesize('current', city, 'metric', NOW))
+
+
+def measure(fn, repeat):
+    """Time fn() repeat times (after a warm-up) and trace one extra run's allocations"""
+    fn()
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        fn()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'median_ms': round(statistics.median(times), 3),
+        'min_ms': round(min(times), 3),
+        'alloc_peak_kb': round((peak - before) / 1024, 1),
+        'alloc_retained_kb': round((current - before) / 1024, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1)
+    }
+
+
+# Stages: each takes a size and returns the function to time
+
+def stage_parse(slots):
+    """Decode a forecast response body and parse it into columns"""
+    from weather_client import decode_json
+    from weather_model import ForecastColumns
+
+    body = json.dumps(forecast_payload('bench city', slots)).encode('utf-8')
+    return lambda: ForecastColumns.from_owm(decode_json(body))
+
+
+def stage_daily(slots):
+    from weather_model import ForecastColumns, DailyForecast
+
+    model = ForecastColumns.from_owm(forecast_payload('bench city', slots))
+    return lambda: DailyForecast.from_columns(model)
+
+
+def stage_export(slots):
+    import weather_export
+    from weather_model import ForecastColumns
+
+    current = current_record('bench city')
+    model = ForecastColumns.from_owm(forecast_payload('bench city', slots))
+    directory = tempfile.mkdtemp(prefix='weather-bench-')
+    filename = os.path.join(directory, 'export.csv')
+
+    def run():
+        finished = threading.Event()
+        weather_export.ExportJob(filename, weather_export.loaded_rows(current, model),
+                                 done=lambda *args: finished.set()).start()
+        finished.wait()
+
+    run.cleanup = lambda: shutil.rmtree(directory, ignore_errors=True)
+    return run
+
+
+def stage_history(cities):
+    from weather_history import HistoryStore
+    from weather_model import ForecastColumns
+
+    payloads = []
+    for i in range(cities):
+        name = f"bench city {i}"
+        payloads.append((current_record(name),
+                         ForecastColumns.from_owm(forecast_payload(name, 40))))
+    directory = tempfile.mkdtemp(prefix='weather-bench-')
+
+    def run():
+        path = os.path.join(directory, 'history.db')
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        store = HistoryStore(path)
+        for current, model in payloads:
+            store.record(current, model)
+        # close() waits for the writer to commit everything
+        store.close()
+
+    run.cleanup = lambda: shutil.rmtree(directory, ignore_errors=True)
+    return run
+
+
+def stage_fetch(cities):
+    import requests
+    from requests.adapters import HTTPAdapter
+    from weather_batch import run_batch
+    from weather_client import WeatherClient
+    from weather_mock import MockServer, parse_args as mock_args
+
+    server = MockServer(mock_args(['--port', '0']))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    api_info = {
+        'current_url': base + '/data/2.5/weather',
+        'forecast_url': base + '/data/2.5/forecast'
+    }
+
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_maxsize=32))
+    client = WeatherClient(session=session, cache=None, max_workers=32)
+    names = [f"bench city {i}" for i in range(cities)]
+
+    def run():
+        failures = []
+        run_batch(names, client, 'bench', api_info, 16,
+                  lambda city, current, forecast, error: error and failures.append(error))
+        if failures:
+            raise RuntimeError(f"{len(failures)} mock fetches failed: {failures[0]}")
+
+    def cleanup():
+        client.shutdown()
+        session.close()
+        server.shutdown()
+        server.server_close()
+
+    run.cleanup = cleanup
+    return run
+
+
+class _Var:
+    """Stand-in for a Tk variable"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = value
+
+
+class _StubWidget:
+    """Minimal widget used when no display is available"""
+
+    def __init__(self, master=None, **options):
+        self.options = dict(options)
+        self.children = []
+        if isinstance(master, _StubWidget):
+            master.children.append(self)
+        self.master = master
+
+    def config(self, **options):
+        self.options.update(options)
+
+    configure = config
+
+    def cget(self, name):
+        return self.options.get(name, '')
+
+    def pack(self, **options):
+        pass
+
+    def grid(self, **options):
+        pass
+
+    def columnconfigure(self, index, **options):
+        pass
+
+    def destroy(self):
+        if isinstance(self.master, _StubWidget) and self in self.master.children:
+            self.master.children.remove(self)
+
+    def winfo_children(self):
+        return list(self.children)
+
+    def winfo_exists(self):
+        return True
+
+
+class _StubTtk:
+    Label = _StubWidget
+    LabelFrame = _StubWidget
+    Frame = _StubWidget
+
+
+class _NoIcons:
+    def get_bytes(self, icon_code):
+        return None
+
+    def fetch_async(self, icon_code, url, callback):
+        pass
+
+
+def make_render_app():
+    """Build a WeatherApp with just the widgets the render path touches
+
+    Returns (app, cleanup).
+    """
+    import tkinter as tk
+    import main
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from weather_client import AVAILABLE_APIS
+
+    root = None
+    try:
+        root = tk.Tk()
+        root.withdraw()
+        ttk = main.ttk
+    except tk.TclError:
+        ttk = _StubTtk
+    original_ttk = main.ttk
+    main.ttk = ttk
+
+    def widget():
+        return ttk.Label(root) if root is not None else ttk.Label()
+
+    app = main.WeatherApp.__new__(main.WeatherApp)
+    app.root = root
+    app.units = _Var('metric')
+    app.theme = _Var('light')
+    app.active_api = _Var('openweathermap')
+    app.chart_type = _Var('temperature')
+    app.chart_range = _Var('forecast')
+    app.available_apis = AVAILABLE_APIS
+    app.weather_icons = {}
+    app.wanted_icons = {}
+    app.icon_cache = _NoIcons()
+    app.current_weather = None
+    app.forecast_model = None
+    app.accent_color = '#0078D7'
+
+    for name in ('city_label', 'date_label', 'temp_label', 'desc_label', 'weather_icon',
+                 'forecast_city_label', 'charts_city_label', 'age_label'):
+        setattr(app, name, widget())
+    app.basic_info_labels = {key: widget() for key in
+                             ('feels_like', 'humidity', 'wind', 'pressure')}
+    app.detail_labels = {key: widget() for key in
+                         ('min_temp', 'max_temp', 'sunrise', 'sunset', 'visibility',
+                          'wind_direction', 'clouds', 'uv_index')}
+    app.forecast_container = ttk.Frame(root) if root is not None else ttk.Frame()
+    app.create_forecast_cards(app.forecast_container)
+
+    app.chart_figure = Figure(figsize=(10, 6), dpi=80)
+    app.chart_ax = app.chart_figure.add_subplot(111)
+    app.chart_line = None
+    app.chart_placeholder = app.chart_ax.text(0.5, 0.5, '', transform=app.chart_ax.transAxes)
+    # Agg's draw_idle draws synchronously, so the chart render is timed
+    app.chart_canvas = FigureCanvasAgg(app.chart_figure)
+
+    def cleanup():
+        main.ttk = original_ttk
+        if root is not None:
+            root.destroy()
+
+    return app, cleanup
+
+
+def stage_render(slots):
+    """process_openweathermap_data for alternating cities (labels and forecast cards)"""
+    from weather_model import ForecastColumns
+
+    app, cleanup = make_render_app()
+    views = [(current_record(name), ForecastColumns.from_owm(forecast_payload(name, slots)))
+             for name in ('bench city a', 'bench city b')]
+    state = {'i': 0}
+
+    def run():
+        state['i'] += 1
+        current, model = views[state['i'] % 2]
+        app.process_openweathermap_data(current, model)
+
+    run.cleanup = cleanup
+    return run
+
+
+def stage_chart(slots):
+    """update_chart for alternating forecasts, including the Agg draw"""
+    from weather_model import ForecastColumns
+
+    app, cleanup = make_render_app()
+    models = [ForecastColumns.from_owm(forecast_payload(name, slots))
+              for name in ('bench city a', 'bench city b')]
+    state = {'i': 0}
+
+    def run():
+        state['i'] += 1
+        app.forecast_model = models[state['i'] % 2]
+        app.update_chart()
+
+    run.cleanup = cleanup
+    return run
+
+
+# name -> (stage factory, size parameter)
+STAGES = {
+    'parse': (stage_parse, 'slots'),
+    'daily': (stage_daily, 'slots'),
+    'render': (stage_render, 'slots'),
+    'chart': (stage_chart, 'slots'),
+    'export': (stage_export, 'slots'),
+    'history': (stage_history, 'cities'),
+    'fetch': (stage_fetch, 'cities')
+}
+
+
+def run_benchmarks(stages, slot_sizes, city_counts, repeat):
+    results = {}
+    for name in stages:
+        factory, parameter = STAGES[name]
+        sizes = slot_sizes if parameter == 'slots' else city_counts
+        for size in sizes:
+            key = f"{name}/{parameter}={size}"
+            run = factory(size)
+            try:
+                results[key] = measure(run, repeat)
+            finally:
+                cleanup = getattr(run, 'cleanup', None)
+                if cleanup:
+                    cleanup()
+            print_result(key, results[key])
+    return results
+
+
+def print_result(key, result):
+    print(f"{key:<24} {result['median_ms']:>10.2f} ms  (min {result['min_ms']:.2f})  "
+          f"alloc peak {result['alloc_peak_kb']:>9.1f} KB  "
+          f"retained {result['alloc_retained_kb']:>8.1f} KB  "
+          f"RSS {result['peak_rss_mb']:.0f} MB", flush=True)
+
+
+def compare(results, baseline, threshold):
+    """Print changes against a baseline; returns the keys that regressed"""
+    regressions = []
+    print(f"\nCompared with baseline from {baseline['meta'].get('created', '?')} "
+          f"(threshold {threshold:.0%}):")
+    for key, result in results.items():
+        old = baseline['results'].get(key)
+        if old is None:
+            print(f"{key:<24} (no baseline)")
+            continue
+
+        time_ratio = result['median_ms'] / old['median_ms'] if old['median_ms'] else 1.0
+        alloc_ratio = (result['alloc_peak_kb'] / old['alloc_peak_kb']
+                       if old['alloc_peak_kb'] > 0 else 1.0)
+        regressed = time_ratio > 1 + threshold or alloc_ratio > 1 + threshold
+        if regressed:
+            regressions.append(key)
+        print(f"{key:<24} time {time_ratio - 1:>+7.1%}  alloc {alloc_ratio - 1:>+7.1%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="weather_bench.py",
+        description="Benchmark the fetch -> process -> render pipeline")
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help=f"comma-separated stages (default: {','.join(STAGES)})")
+    parser.add_argument('--slots', default=','.join(map(str, DEFAULT_SLOTS)),
+                        help="forecast sizes in 3-hour slots (default: 40,400,4000)")
+    parser.add_argument('--cities', default=','.join(map(str, DEFAULT_CITIES)),
+                        help="city counts for the fetch and history stages (default: 1,10,100)")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="timed runs per benchmark (default: 5)")
+    parser.add_argument('--save', default=None,
+                        help="write results to this JSON baseline file")
+    parser.add_argument('--compare', default=None,
+                        help="compare results with this JSON baseline file")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="relative slowdown/allocation growth reported as a "
+                             "regression (default: 0.2)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        print(f"Unknown stage(s): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    # Keep log output from the stages off the terminal
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    results = run_benchmarks(stages, [int(n) for n in args.slots.split(',')],
+                             [int(n) for n in args.cities.split(',')], args.repeat)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'meta': {
+                    'created': datetime.now().isoformat(timespec='seconds'),
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'repeat': args.repeat
+                },
+                'results': results
+            }, f, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
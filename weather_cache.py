@@ -0,0 +1,306 @@
+import json
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+import requests
+from weather_config import atomic_write_bytes, atomic_write_json
+from weather_metrics import span
+from weather_model import ENDPOINT_RECORDS
+
+# Current conditions change faster than the 3-hourly forecast
+DEFAULT_TTLS = {
+    'current': 10 * 60,
+    'forecast': 60 * 60
+}
+
+# Version of the on-disk entry layout; other versions are treated as misses
+CACHE_FORMAT = 2
+
+# Full OpenWeatherMap icon set (day and night variants)
+OWM_ICON_CODES = [
+    f"{code}{variant}"
+    for code in ('01', '02', '03', '04', '09', '10', '11', '13', '50')
+    for variant in ('d', 'n')
+]
+
+
+def normalize_city(city):
+    """Normalize a free-text city name for use in cache keys"""
+    return " ".join(city.split()).casefold()
+
+
+class ResponseCache:
+    """Two-tier (in-memory LRU + on-disk) cache of parsed API responses
+
+    Memory holds the CurrentWeather / ForecastColumns records themselves;
+    disk holds their to_dict() form.
+    """
+
+    def __init__(self, cache_dir, ttls=None, max_entries=128):
+        self.cache_dir = cache_dir
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.max_entries = max_entries
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Hit/miss counters
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        except OSError as e:
+            logging.error(f"Could not create cache directory: {str(e)}")
+
+    def make_key(self, city, endpoint):
+        """Build the cache key for a city/endpoint combination
+
+        Records are in canonical units, so one entry serves every unit system.
+        """
+        return f"{endpoint}|{normalize_city(city)}"
+
+    def _disk_path(self, key):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _is_fresh(self, endpoint, stored_at):
+        ttl = self.ttls.get(endpoint, 0)
+        return time.time() - stored_at < ttl
+
+    def _read_disk(self, key, endpoint):
+        """Return (stored_at, record) from the disk tier, or None"""
+        try:
+            with open(self._disk_path(key), 'r') as f:
+                entry = json.load(f)
+            if entry.get('key') != key or entry.get('format') != CACHE_FORMAT:
+                return None
+            return entry['stored_at'], ENDPOINT_RECORDS[endpoint].from_dict(entry['data'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _remember(self, key, stored_at, data):
+        """Insert into the memory tier, evicting least recently used entries"""
+        self._memory[key] = (stored_at, data)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, city, endpoint):
+        """Return cached data if present and not expired, otherwise None"""
+        key = self.make_key(city, endpoint)
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                stored_at, data = entry
+                if self._is_fresh(endpoint, stored_at):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return data
+                del self._memory[key]
+
+        # Fall back to the disk tier
+        entry = self._read_disk(key, endpoint)
+
+        with self._lock:
+            if entry is not None and self._is_fresh(endpoint, entry[0]):
+                self._remember(key, *entry)
+                self.hits += 1
+                self.disk_hits += 1
+                return entry[1]
+
+            self.misses += 1
+            return None
+
+    def get_stale(self, city, endpoint):
+        """Return (data, stored_at) for the last stored response, even if expired
+
+        Used to show something immediately while a fresh copy is fetched.
+        Does not count towards the hit/miss statistics.
+        """
+        key = self.make_key(city, endpoint)
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                stored_at, data = entry
+                return data, stored_at
+
+        entry = self._read_disk(key, endpoint)
+        if entry is None:
+            return None
+        return entry[1], entry[0]
+
+    def put(self, city, endpoint, data):
+        """Store a parsed response record in both cache tiers"""
+        key = self.make_key(city, endpoint)
+        stored_at = time.time()
+
+        with self._lock:
+            self._remember(key, stored_at, data)
+
+        try:
+            atomic_write_json(self._disk_path(key),
+                              {'key': key, 'format': CACHE_FORMAT, 'stored_at': stored_at,
+                               'data': data.to_dict()}, indent=None)
+        except OSError as e:
+            logging.error(f"Error writing response cache: {str(e)}")
+
+    def clear(self):
+        """Remove all cached responses from memory and disk"""
+        with self._lock:
+            self._memory.clear()
+        try:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.json'):
+                    os.remove(os.path.join(self.cache_dir, name))
+        except OSError as e:
+            logging.error(f"Error clearing response cache: {str(e)}")
+
+    def stats(self):
+        """Return hit/miss counters"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'entries': len(self._memory),
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+
+class IconCache:
+    """Content-addressed on-disk cache of raw weather icon bytes"""
+
+    def __init__(self, cache_dir, session=None, timeout=5):
+        self.cache_dir = cache_dir
+        self.session = session or requests
+        self.timeout = timeout
+        self.index_file = os.path.join(cache_dir, 'index.json')
+
+        self._memory = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        except OSError as e:
+            logging.error(f"Could not create icon cache directory: {str(e)}")
+
+        # Map of icon code -> sha256 of the PNG bytes
+        self._index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        try:
+            atomic_write_json(self.index_file, self._index, indent=None)
+        except OSError as e:
+            logging.error(f"Error writing icon cache index: {str(e)}")
+
+    def _blob_path(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}.png")
+
+    def get_bytes(self, icon_code):
+        """Return cached PNG bytes for an icon code, or None on a miss"""
+        with self._lock:
+            data = self._memory.get(icon_code)
+            digest = self._index.get(icon_code)
+        if data is not None or digest is None:
+            return data
+
+        try:
+            with open(self._blob_path(digest), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        # Guard against truncated or tampered blobs
+        if hashlib.sha256(data).hexdigest() != digest:
+            return None
+
+        with self._lock:
+            self._memory[icon_code] = data
+        return data
+
+    def store(self, icon_code, data):
+        """Store PNG bytes under their content hash"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            try:
+                atomic_write_bytes(path, data)
+            except OSError as e:
+                logging.error(f"Error writing icon cache: {str(e)}")
+
+        with self._lock:
+            self._memory[icon_code] = data
+            self._index[icon_code] = digest
+            self._save_index()
+
+    def download(self, icon_code, icon_url):
+        """Download an icon (blocking) and store it in the cache"""
+        with span('icon.download'):
+            response = self.session.get(icon_url, timeout=self.timeout)
+        response.raise_for_status()
+        self.store(icon_code, response.content)
+        return response.content
+
+    def fetch_async(self, icon_code, icon_url, callback):
+        """Download an icon in the background and pass its bytes to callback
+
+        Concurrent requests for the same icon share a single download.
+        The callback receives None if the download fails and runs on the
+        worker thread.
+        """
+        with self._lock:
+            if icon_code in self._pending:
+                self._pending[icon_code].append(callback)
+                return
+            self._pending[icon_code] = [callback]
+
+        def worker():
+            try:
+                data = self.download(icon_code, icon_url)
+            except Exception as e:
+                logging.error(f"Error downloading weather icon {icon_code}: {str(e)}")
+                data = None
+
+            with self._lock:
+                callbacks = self._pending.pop(icon_code, [])
+            for cb in callbacks:
+                cb(data)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def prefetch(self, icon_url_template, icon_codes=None):
+        """Download any missing icons from the full set in a background thread"""
+        codes = icon_codes or OWM_ICON_CODES
+
+        def worker():
+            for code in codes:
+                if self.get_bytes(code) is not None:
+                    continue
+                try:
+                    self.download(code, icon_url_template.format(icon=code))
+                except Exception as e:
+                    logging.error(f"Error prefetching weather icon {code}: {str(e)}")
+                    # Icon host is likely unreachable; retry on next start
+                    break
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,97 @@
+import json
+import logging
+import threading
+from weather_cache import normalize_city
+from weather_config import ConfigStore
+
+
+class CityResolver:
+    """Persistent map from free-text city names to the provider's city ids
+
+    Names are normalized (case and whitespace) and resolved once: the first
+    response for a name supplies the city id and coordinates, which are
+    saved and then used for later requests and cache keys, so spellings of
+    the same place share one city. Safe to use from worker threads.
+
+    The file is written in the background and merged with its current
+    contents first, so the app and batch mode can share it.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._places = self._load()
+        # Names forgotten since the last write (not restored by the merge)
+        self._forgotten = set()
+        self._store = None
+        if path:
+            self._store = ConfigStore(path, name='cities', indent=None, initial=self._places)
+
+    def _load(self):
+        if not self.path:
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                places = json.load(f)
+            return places if isinstance(places, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logging.error(f"Error loading city resolutions: {str(e)}")
+            return {}
+
+    def _merged(self):
+        """Snapshot to write: resolutions saved by other processes plus ours (writer thread)"""
+        on_disk = self._load()
+        with self._lock:
+            for name, place in on_disk.items():
+                if name not in self._forgotten:
+                    self._places.setdefault(name, place)
+            self._forgotten.clear()
+            return dict(self._places)
+
+    def lookup(self, city):
+        """Return the resolved place ({id, name, country, lat, lon}) or None"""
+        with self._lock:
+            return self._places.get(normalize_city(city))
+
+    def key(self, city):
+        """Canonical key for a city: its id once resolved, else its normalized name"""
+        place = self.lookup(city)
+        if place is not None:
+            return f"id:{place['id']}"
+        return normalize_city(city)
+
+    def same_city(self, a, b):
+        return self.key(a) == self.key(b)
+
+    def learn(self, city, current):
+        """Remember the place a CurrentWeather response for city resolved to"""
+        if current.city_id is None:
+            return None
+        place = {'id': current.city_id, 'name': current.name, 'country': current.country,
+                 'lat': current.lat, 'lon': current.lon}
+        name = normalize_city(city)
+        with self._lock:
+            if self._places.get(name) == place:
+                return place
+            self._places[name] = place
+            self._forgotten.discard(name)
+        if self._store is not None:
+            self._store.save_later(self._merged)
+        return place
+
+    def forget(self, city):
+        """Drop a resolution, e.g. when the provider no longer knows the id"""
+        name = normalize_city(city)
+        with self._lock:
+            dropped = self._places.pop(name, None) is not None
+            if dropped:
+                self._forgotten.add(name)
+        if dropped and self._store is not None:
+            self._store.save_later(self._merged)
+
+    def close(self):
+        """Write pending changes"""
+        if self._store is not None:
+            self._store.close()
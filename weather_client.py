@@ -0,0 +1,228 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from weather_metrics import metrics, span
+from weather_model import ENDPOINT_RECORDS
+from weather_units import CANONICAL_UNITS
+
+# orjson decodes API responses several times faster when it is installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Supported weather API providers
+AVAILABLE_APIS = {
+    'openweathermap': {
+        'name': 'OpenWeatherMap',
+        'current_url': 'http://api.openweathermap.org/data/2.5/weather',
+        'forecast_url': 'http://api.openweathermap.org/data/2.5/forecast',
+        'icon_url': 'http://openweathermap.org/img/wn/{icon}@2x.png'
+    }
+}
+
+# Point every API URL at another host, e.g. the local mock server
+BASE_URL_ENV = 'OWM_BASE_URL'
+
+# Append every API response to this JSONL archive
+RECORD_ENV = 'OWM_RECORD'
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        # DNS lookup, TCP connect (and TLS) of a new pooled connection
+        with span('http.connect'):
+            super().connect()
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        with span('http.connect'):
+            super().connect()
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools record connection setup time"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool
+        }
+
+
+def get_session():
+    """Return the shared HTTP session with a keep-alive connection pool"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = TimedHTTPAdapter(pool_connections=4, pool_maxsize=32)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = 'AdvancedWeatherForecast/2.0'
+            _session = session
+        return _session
+
+
+def resolve_apis(base_url=None):
+    """Return AVAILABLE_APIS, rebased onto base_url (or $OWM_BASE_URL) if set"""
+    base_url = base_url or os.environ.get(BASE_URL_ENV)
+    if not base_url:
+        return AVAILABLE_APIS
+
+    base_url = base_url.rstrip('/')
+    return {
+        name: {
+            key: base_url + urlparse(value).path if key.endswith('_url') else value
+            for key, value in info.items()
+        }
+        for name, info in AVAILABLE_APIS.items()
+    }
+
+
+def enable_recording(path=None, session=None):
+    """Record API responses to path (or $OWM_RECORD) for the mock server
+
+    Returns True if recording was enabled.
+    """
+    path = path or os.environ.get(RECORD_ENV)
+    if not path:
+        return False
+
+    from weather_mock import ResponseRecorder
+    session = session or get_session()
+    session.hooks['response'].append(ResponseRecorder(path).hook)
+    logging.info(f"Recording API responses to {path}")
+    return True
+
+
+def decode_json(content):
+    """Decode a JSON response body (bytes), using orjson if available"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def build_params(city, api_key, place=None):
+    """Build OpenWeatherMap query parameters (always in canonical units)
+
+    A resolved place (see CityResolver) is requested by its city id
+    instead of by name.
+    """
+    params = {"id": place['id']} if place else {"q": city}
+    params.update({
+        "appid": api_key,
+        "units": CANONICAL_UNITS
+    })
+    return params
+
+
+class WeatherClient:
+    """Fetches current weather and forecast data over a pooled session
+
+    Responses are parsed into compact records (see weather_model) as soon
+    as they arrive; the raw JSON is not kept. With a resolver, cities are
+    requested and cached by their canonical id once it is known.
+    """
+
+    def __init__(self, session=None, cache=None, max_workers=8, resolver=None):
+        self.session = session or get_session()
+        self.cache = cache
+        self.resolver = resolver
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='weather-fetch')
+
+    def _fetch_endpoint(self, endpoint, url, city, cache_key, params):
+        if self.cache is not None:
+            data = self.cache.get(cache_key, endpoint)
+            if data is not None:
+                logging.debug(f"Cache hit {endpoint} for {city}",
+                              extra={'city': city, 'endpoint': endpoint, 'cached': True})
+                return data, True
+
+        started = time.perf_counter()
+        status = None
+        try:
+            with span(f'http.{endpoint}'):
+                response = self.session.get(url, params=params, timeout=10)
+            # Time from sending the request until the headers arrived
+            metrics.record('http.response', response.elapsed.total_seconds() * 1000)
+            status = response.status_code
+            response.raise_for_status()
+            with span('json.decode'):
+                data = decode_json(response.content)
+        finally:
+            latency_ms = round((time.perf_counter() - started) * 1000, 1)
+            logging.info(f"API request {endpoint} for {city}: HTTP {status} in {latency_ms:.0f} ms",
+                         extra={'city': city, 'endpoint': endpoint,
+                                'latency_ms': latency_ms, 'status': status})
+
+        with span(f'parse.{endpoint}'):
+            record = ENDPOINT_RECORDS[endpoint].from_owm(data)
+
+        if self.cache is not None:
+            self.cache.put(cache_key, endpoint, record)
+        return record, False
+
+    def fetch_weather(self, city, api_key, api_info):
+        """Fetch current and forecast data concurrently
+
+        Returns a (current, forecast_model, cached) tuple of CurrentWeather
+        and ForecastColumns records in canonical (metric) units, where
+        cached is True only if both responses came from the cache.
+        """
+        place, cache_key = None, city
+        if self.resolver is not None:
+            place = self.resolver.lookup(city)
+            cache_key = self.resolver.key(city)
+        params = build_params(city, api_key, place)
+
+        current_future = self._executor.submit(
+            self._fetch_endpoint, 'current', api_info['current_url'], city, cache_key, params)
+        forecast_future = self._executor.submit(
+            self._fetch_endpoint, 'forecast', api_info['forecast_url'], city, cache_key, params)
+
+        try:
+            current, current_cached = current_future.result()
+            forecast_model, forecast_cached = forecast_future.result()
+        except requests.exceptions.HTTPError as e:
+            if place is None or getattr(e.response, 'status_code', None) != 404:
+                raise
+            # The provider no longer knows this id; resolve the name again
+            logging.warning(f"City id {place['id']} for {city} not found, resolving by name")
+            self.resolver.forget(city)
+            return self.fetch_weather(city, api_key, api_info)
+
+        if self.resolver is not None and place is None:
+            place = self.resolver.learn(city, current)
+            # Later requests use the id, so file these responses under it too
+            if place is not None and self.cache is not None:
+                resolved_key = self.resolver.key(city)
+                self.cache.put(resolved_key, 'current', current)
+                self.cache.put(resolved_key, 'forecast', forecast_model)
+        return current, forecast_model, current_cached and forecast_cached
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,176 @@
+import copy
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from weather_metrics import span
+
+
+def atomic_write_json(path, data, indent=2):
+    """Write JSON to path via temp file + fsync + rename"""
+    _atomic_write(path, 'w', lambda f: json.dump(data, f, indent=indent))
+
+
+def atomic_write_bytes(path, data):
+    """Write bytes to path via temp file + fsync + rename"""
+    _atomic_write(path, 'wb', lambda f: f.write(data))
+
+
+def _atomic_write(path, mode, write):
+    # A unique temp file per call, so concurrent writers never share one
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', dir=directory)
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    # Persist the rename itself (not supported on Windows)
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class ConfigStore:
+    """Debounced, atomic writer for the configuration (or another JSON) file
+
+    save() only records a snapshot and marks the store dirty (saves that
+    match the last snapshot are ignored). A background
+    thread writes the latest snapshot once no further saves have arrived
+    for ``debounce`` seconds (or ``max_delay`` seconds after the first
+    pending save), so bursts of saves turn into a single write. ``name``
+    labels the writer thread, log messages and the ``<name>.save`` metric.
+    For large data that changes often, save_later() defers building the
+    snapshot to the writer thread.
+    """
+
+    def __init__(self, path, debounce=1.0, max_delay=5.0, on_error=None, initial=None,
+                 name='config', indent=2):
+        self.path = path
+        self.name = name
+        self.indent = indent
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.on_error = on_error
+
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending = None
+        self._last_snapshot = copy.deepcopy(initial)
+        self._seq = 0
+        self._written_seq = 0
+        self._first_dirty = None
+        self._last_dirty = None
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name=f'{name}-writer', daemon=True)
+        self._thread.start()
+
+    def save(self, config):
+        """Schedule config to be written (a snapshot is taken now)"""
+        snapshot = copy.deepcopy(config)
+        with self._lock:
+            # Nothing changed since the last save
+            if snapshot == self._last_snapshot:
+                return
+            self._last_snapshot = snapshot
+            self._mark_dirty(snapshot)
+
+    def save_later(self, build):
+        """Schedule a write of build(), which is called when the write is due
+
+        Nothing is copied or compared now, so marking the store dirty is
+        cheap however large the data is.
+        """
+        with self._lock:
+            self._last_snapshot = None
+            self._mark_dirty(build)
+
+    def _mark_dirty(self, data):
+        # Called with self._lock held
+        now = time.monotonic()
+        if self._pending is None:
+            self._first_dirty = now
+        self._seq += 1
+        self._pending = (self._seq, data)
+        self._last_dirty = now
+        self._wakeup.notify()
+
+    @property
+    def dirty(self):
+        with self._lock:
+            return self._pending is not None
+
+    def _take_due(self):
+        """Wait until a pending snapshot is due; returns it (or None when closed)"""
+        with self._lock:
+            while True:
+                if self._pending is not None:
+                    now = time.monotonic()
+                    due = min(self._last_dirty + self.debounce,
+                              self._first_dirty + self.max_delay)
+                    if self._closed or now >= due:
+                        pending, self._pending = self._pending, None
+                        return pending
+                    self._wakeup.wait(due - now)
+                elif self._closed:
+                    return None
+                else:
+                    self._wakeup.wait()
+
+    def _write(self, pending):
+        seq, snapshot = pending
+        with self._write_lock:
+            # A newer snapshot may already have been flushed
+            if seq <= self._written_seq:
+                return
+            try:
+                with span(f'{self.name}.save'):
+                    if callable(snapshot):
+                        snapshot = snapshot()
+                    atomic_write_json(self.path, snapshot, indent=self.indent)
+                self._written_seq = seq
+                logging.info(f"Saved {self.name} to {self.path}")
+            except Exception as e:
+                logging.error(f"Error saving {self.name}: {str(e)}")
+                # Let the next save retry even if nothing else changes
+                with self._lock:
+                    self._last_snapshot = None
+                if self.on_error:
+                    self.on_error(e)
+
+    def _run(self):
+        while True:
+            pending = self._take_due()
+            if pending is None:
+                return
+            self._write(pending)
+
+    def flush(self):
+        """Write any pending snapshot immediately on the calling thread"""
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is not None:
+            self._write(pending)
+
+    def close(self):
+        """Flush pending changes and stop the writer thread"""
+        self.flush()
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+        self._thread.join(timeout=5)
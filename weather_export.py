@@ -0,0 +1,244 @@
+import csv
+import gzip
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+import numpy as np
+from weather_units import temperature, speed, rounded
+
+CURRENT_HEADER = ['City', 'Date', 'Temperature', 'Feels Like',
+                  'Description', 'Humidity', 'Pressure', 'Wind Speed']
+
+FORECAST_HEADER = ['Date', 'Temperature', 'Min Temp', 'Max Temp',
+                   'Description', 'Humidity', 'Wind Speed']
+
+DAILY_HEADER = ['Date', 'Min Temp', 'Max Temp', 'Mean Temp', 'Description',
+                'Humidity', 'Pressure', 'Wind Speed', 'Max Wind Speed', 'Precipitation']
+
+# Flat per-observation layout used by the streaming exporter
+OBSERVATION_HEADER = ['City ID', 'City', 'Kind', 'Date', 'Temperature', 'Feels Like',
+                      'Min Temp', 'Max Temp', 'Humidity', 'Pressure', 'Wind Speed',
+                      'Wind Direction', 'Clouds', 'Precipitation', 'Icon', 'Description']
+
+
+def current_row(current, units='metric'):
+    """Build the export row for a CurrentWeather record"""
+    # City-local time, like the forecast and history rows
+    dt = datetime.fromtimestamp(current.dt + current.utc_offset, timezone.utc)
+    return [
+        current.display_name,
+        dt.strftime('%Y-%m-%d %H:%M'),
+        rounded(temperature(current.temp, units)),
+        rounded(temperature(current.feels_like, units)),
+        current.description,
+        current.humidity,
+        current.pressure,
+        rounded(speed(current.wind_speed, units))
+    ]
+
+
+def forecast_rows(forecast_model, units='metric'):
+    """Yield export rows from a ForecastColumns model"""
+    yield from map(list, zip(
+        forecast_model.date_strings().tolist(),
+        rounded(temperature(forecast_model.temp, units)),
+        rounded(temperature(forecast_model.temp_min, units)),
+        rounded(temperature(forecast_model.temp_max, units)),
+        forecast_model.descriptions(),
+        forecast_model.humidity.tolist(),
+        rounded(speed(forecast_model.wind_speed, units))
+    ))
+
+
+def daily_rows(daily, units='metric'):
+    """Yield export rows from a DailyForecast aggregate"""
+    yield from map(list, zip(
+        np.datetime_as_string(daily.days).tolist(),
+        rounded(temperature(daily.temp_min, units)),
+        rounded(temperature(daily.temp_max, units)),
+        rounded(temperature(daily.temp_mean, units)),
+        daily.descriptions,
+        np.round(daily.humidity_mean, 1).tolist(),
+        np.round(daily.pressure_mean, 1).tolist(),
+        rounded(speed(daily.wind_speed_mean, units)),
+        rounded(speed(daily.wind_speed_max, units)),
+        np.round(daily.precipitation_sum, 2).tolist()
+    ))
+
+
+def daily_records(daily, units='metric'):
+    """Daily aggregates as a list of dicts"""
+    return [dict(zip(DAILY_HEADER, row)) for row in daily_rows(daily, units)]
+
+
+def json_record(query, current, forecast_model, units='metric'):
+    """Build a flat JSON Lines record for one city, converted to units"""
+    return {
+        'query': query,
+        'current': dict(zip(CURRENT_HEADER, current_row(current, units))),
+        'forecast': [dict(zip(FORECAST_HEADER, row))
+                     for row in forecast_rows(forecast_model, units)],
+        'daily': daily_records(forecast_model.daily, units)
+    }
+
+
+def loaded_rows(current, forecast_model, units='metric'):
+    """Yield observation rows for a loaded city: current, forecast slots and daily summary
+
+    Records are in canonical (metric) units; values are converted to units.
+    """
+    city_id = current.city_id
+    city = current.display_name
+    local = datetime.fromtimestamp(current.dt + current.utc_offset, timezone.utc)
+
+    yield [
+        city_id, city, 'current', local.strftime('%Y-%m-%d %H:%M'),
+        *rounded(temperature([current.temp, current.feels_like, current.temp_min,
+                              current.temp_max], units)),
+        current.humidity, current.pressure, rounded(speed(current.wind_speed, units)),
+        current.wind_deg, current.clouds, current.precipitation,
+        current.icon, current.description
+    ]
+
+    m = forecast_model
+    n = len(m)
+    yield from map(list, zip(
+        [city_id] * n, [city] * n, ['forecast'] * n, m.date_strings().tolist(),
+        rounded(temperature(m.temp, units)), [None] * n,
+        rounded(temperature(m.temp_min, units)), rounded(temperature(m.temp_max, units)),
+        m.humidity.tolist(), m.pressure.tolist(), rounded(speed(m.wind_speed, units)),
+        m.wind_deg.tolist(), m.clouds.tolist(), m.precipitation.tolist(),
+        m.icons(), m.descriptions()
+    ))
+
+    daily = m.daily
+    n = len(daily)
+    yield from map(list, zip(
+        [city_id] * n, [city] * n, ['daily'] * n,
+        np.datetime_as_string(daily.days).tolist(),
+        rounded(temperature(daily.temp_mean, units)), [None] * n,
+        rounded(temperature(daily.temp_min, units)), rounded(temperature(daily.temp_max, units)),
+        np.round(daily.humidity_mean, 1).tolist(), np.round(daily.pressure_mean, 1).tolist(),
+        rounded(speed(daily.wind_speed_mean, units)), [None] * n,
+        np.round(daily.clouds_mean, 1).tolist(), np.round(daily.precipitation_sum, 2).tolist(),
+        daily.icons, daily.descriptions
+    ))
+
+
+# File extension (before any .gz) -> export format
+EXPORT_FORMATS = {'.csv': 'csv', '.json': 'json', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}
+
+
+def export_format(filename):
+    """Return 'csv', 'json' or 'jsonl' based on the file extension (ignoring .gz)
+
+    Raises ValueError for any other extension.
+    """
+    name = filename[:-3] if filename.endswith('.gz') else filename
+    extension = os.path.splitext(name)[1].lower()
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export file type '{extension or name}' "
+                         f"(use {', '.join(EXPORT_FORMATS)})")
+    return EXPORT_FORMATS[extension]
+
+
+def open_output(filename):
+    """Open an export file for text writing, gzip-compressed if it ends in .gz"""
+    if filename.endswith('.gz'):
+        return gzip.open(filename, 'wt', newline='', encoding='utf-8')
+    return open(filename, 'w', newline='', encoding='utf-8')
+
+
+class ExportJob:
+    """Stream observation rows to CSV, JSON or JSON Lines on a background thread
+
+    ``rows`` is any iterable of rows in OBSERVATION_HEADER order; it is
+    consumed lazily, so memory use does not grow with the export size.
+    ``total`` is the row count, None if unknown, or a callable that
+    computes it on the worker thread. ``progress(written, total)`` and
+    ``done(written, error, cancelled)`` are called from the worker thread.
+    """
+
+    def __init__(self, filename, rows, total=None, progress=None, done=None,
+                 progress_every=1000):
+        self.filename = filename
+        # Unsupported file types are rejected before anything is written
+        self.format = export_format(filename)
+        self.rows = rows
+        self.total = total
+        self.progress = progress
+        self.done = done
+        self.progress_every = progress_every
+        self.written = 0
+
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='export', daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Request cancellation; the partial file is removed"""
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def _run(self):
+        error = None
+        try:
+            fmt = self.format
+            if callable(self.total):
+                self.total = self.total()
+                if self.progress:
+                    self.progress(0, self.total)
+            with open_output(self.filename) as f:
+                if fmt == 'csv':
+                    writer = csv.writer(f)
+                    writer.writerow(OBSERVATION_HEADER)
+                    write = writer.writerow
+                elif fmt == 'json':
+                    # One array, still written a row at a time
+                    f.write("[")
+
+                    def write(row):
+                        f.write(",\n" if self.written else "\n")
+                        f.write(json.dumps(dict(zip(OBSERVATION_HEADER, row))))
+                else:
+                    def write(row):
+                        f.write(json.dumps(dict(zip(OBSERVATION_HEADER, row))))
+                        f.write("\n")
+
+                for row in self.rows:
+                    write(row)
+                    self.written += 1
+                    if self.written % self.progress_every == 0:
+                        if self._cancel.is_set():
+                            break
+                        if self.progress:
+                            self.progress(self.written, self.total)
+                if fmt == 'json':
+                    f.write("\n]\n")
+        except Exception as e:
+            logging.error(f"Error exporting data: {str(e)}")
+            error = e
+        finally:
+            close = getattr(self.rows, 'close', None)
+            if close:
+                close()
+
+        if self._cancel.is_set() or error is not None:
+            try:
+                os.remove(self.filename)
+            except OSError:
+                pass
+        elif self.progress:
+            self.progress(self.written, self.total)
+
+        if self.done:
+            self.done(self.written, error, self._cancel.is_set())
@@ -0,0 +1,252 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+import numpy as np
+from weather_metrics import span
+from weather_units import CANONICAL_UNITS, temperature, speed
+
+# Observation columns stored for every current reading and forecast slot
+COLUMNS = ['temp', 'feels_like', 'temp_min', 'temp_max', 'humidity', 'pressure',
+           'wind_speed', 'wind_deg', 'clouds', 'precipitation', 'icon', 'description']
+
+# Whole-number columns, stored as REAL but exported as integers like loaded data
+INTEGER_COLUMNS = ('humidity', 'pressure', 'clouds')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cities (
+    city_id INTEGER PRIMARY KEY,
+    name TEXT,
+    country TEXT,
+    lat REAL,
+    lon REAL,
+    timezone INTEGER
+);
+CREATE TABLE IF NOT EXISTS observations (
+    city_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    dt INTEGER NOT NULL,
+    fetched_at INTEGER NOT NULL,
+    temp REAL,
+    feels_like REAL,
+    temp_min REAL,
+    temp_max REAL,
+    humidity REAL,
+    pressure REAL,
+    wind_speed REAL,
+    wind_deg REAL,
+    clouds REAL,
+    precipitation REAL,
+    icon TEXT,
+    description TEXT,
+    PRIMARY KEY (city_id, kind, dt)
+) WITHOUT ROWID;
+"""
+
+
+def _convert_rows(rows, units):
+    """Convert a chunk of export rows from metric to the display unit system"""
+    # temp, feels_like, temp_min, temp_max, then wind speed (None becomes NaN)
+    values = np.array([[row[4], row[5], row[6], row[7], row[10]] for row in rows],
+                      dtype=np.float64)
+    values[:, :4] = temperature(values[:, :4], units)
+    values[:, 4] = speed(values[:, 4], units)
+    for row, converted in zip(rows, np.round(values, 2).tolist()):
+        row = list(row)
+        for i, value in zip((4, 5, 6, 7, 10), converted):
+            row[i] = None if value != value else value
+        yield row
+
+
+class HistoryStore:
+    """Local SQLite (WAL) time-series store of fetched observations
+
+    Writes are queued and committed in batches by a background thread, so
+    record() never blocks the caller on disk I/O. Values are stored in
+    canonical (metric) units, like the records they come from.
+    """
+
+    def __init__(self, path, batch_size=1000):
+        self.path = path
+        self.batch_size = batch_size
+
+        self._queue = queue.Queue()
+        self._read_lock = threading.Lock()
+        self._read_conn = None
+
+        # Create the schema before any reader connects
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.commit()
+        conn.close()
+
+        self._writer = threading.Thread(target=self._run, name='history-writer', daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def record(self, current, forecast_model=None):
+        """Queue a current observation (and optional forecast slots) for writing"""
+        try:
+            city_id = current.city_id
+            fetched_at = int(time.time())
+
+            city_row = (city_id, current.name, current.country,
+                        current.lat, current.lon, current.utc_offset)
+
+            rows = [(
+                city_id, 'current', current.dt, fetched_at,
+                current.temp, current.feels_like, current.temp_min, current.temp_max,
+                current.humidity, current.pressure,
+                current.wind_speed, current.wind_deg,
+                current.clouds, current.precipitation,
+                current.icon, current.description
+            )]
+
+            if forecast_model is not None and len(forecast_model):
+                m = forecast_model
+                n = len(m)
+                rows.extend(zip(
+                    [city_id] * n, ['forecast'] * n, m.dt.tolist(), [fetched_at] * n,
+                    m.temp.tolist(), [None] * n, m.temp_min.tolist(), m.temp_max.tolist(),
+                    m.humidity.tolist(), m.pressure.tolist(),
+                    m.wind_speed.tolist(), m.wind_deg.tolist(), m.clouds.tolist(),
+                    m.precipitation.tolist(), m.icons(), m.descriptions()
+                ))
+        except (KeyError, IndexError, TypeError) as e:
+            logging.error(f"Could not record weather history: {str(e)}")
+            return
+
+        self._queue.put((city_row, rows))
+
+    def _run(self):
+        """Writer thread: drain the queue and commit in batches"""
+        conn = self._connect()
+        placeholders = ", ".join("?" * (4 + len(COLUMNS)))
+        insert_obs = (f"INSERT OR REPLACE INTO observations "
+                      f"(city_id, kind, dt, fetched_at, {', '.join(COLUMNS)}) "
+                      f"VALUES ({placeholders})")
+        insert_city = "INSERT OR REPLACE INTO cities VALUES (?, ?, ?, ?, ?, ?)"
+
+        running = True
+        while running:
+            item = self._queue.get()
+            batch = []
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if item is None:
+                running = False
+
+            if not batch:
+                continue
+            try:
+                with span('history.write'), conn:
+                    conn.executemany(insert_city, {b[0] for b in batch})
+                    conn.executemany(insert_obs, (row for b in batch for row in b[1]))
+            except sqlite3.Error as e:
+                logging.error(f"Error writing weather history: {str(e)}")
+
+        conn.close()
+
+    def query(self, city_id, t0, t1, kind='current'):
+        """Return observations for a city between t0 and t1 (epoch seconds)
+
+        The result is a dict of NumPy arrays keyed by 'dt' and the numeric
+        entries of COLUMNS, ordered by time.
+        """
+        numeric = [c for c in COLUMNS if c not in ('icon', 'description')]
+        sql = (f"SELECT dt, {', '.join(numeric)} FROM observations "
+               f"WHERE city_id = ? AND kind = ? AND dt BETWEEN ? AND ? ORDER BY dt")
+
+        with self._read_lock:
+            if self._read_conn is None:
+                self._read_conn = self._connect()
+            rows = self._read_conn.execute(sql, (city_id, kind, int(t0), int(t1))).fetchall()
+
+        data = np.array(rows, dtype=np.float64).reshape(len(rows), len(numeric) + 1)
+        result = {'dt': data[:, 0].astype(np.int64)}
+        for i, name in enumerate(numeric, start=1):
+            result[name] = data[:, i]
+        return result
+
+    def _range_filter(self, city_ids, t0, t1, kind):
+        where = ["o.dt BETWEEN ? AND ?"]
+        params = [int(t0), int(t1)]
+        if kind:
+            where.append("o.kind = ?")
+            params.append(kind)
+        if city_ids:
+            where.append(f"o.city_id IN ({', '.join('?' * len(city_ids))})")
+            params.extend(city_ids)
+        return " AND ".join(where), params
+
+    def count_rows(self, city_ids=None, t0=0, t1=2 ** 62, kind=None):
+        """Count stored observations matching a range query"""
+        where, params = self._range_filter(city_ids, t0, t1, kind)
+        with self._read_lock:
+            if self._read_conn is None:
+                self._read_conn = self._connect()
+            return self._read_conn.execute(
+                f"SELECT COUNT(*) FROM observations o WHERE {where}", params).fetchone()[0]
+
+    def iter_rows(self, city_ids=None, t0=0, t1=2 ** 62, kind=None, units='metric',
+                  chunk_size=1000):
+        """Yield export rows (OBSERVATION_HEADER order) for a range query
+
+        Rows are streamed from a dedicated connection in chunks, so this is
+        safe to consume from a worker thread over arbitrarily large ranges.
+        """
+        where, params = self._range_filter(city_ids, t0, t1, kind)
+        columns = [f"CAST(o.{c} AS INTEGER)" if c in INTEGER_COLUMNS else f"o.{c}"
+                   for c in COLUMNS]
+        sql = (f"SELECT o.city_id, c.name || ', ' || c.country, o.kind, "
+               f"strftime('%Y-%m-%d %H:%M', o.dt + COALESCE(c.timezone, 0), 'unixepoch'), "
+               f"{', '.join(columns)} "
+               f"FROM observations o LEFT JOIN cities c ON c.city_id = o.city_id "
+               f"WHERE {where} ORDER BY o.city_id, o.kind, o.dt")
+
+        conn = self._connect()
+        try:
+            cursor = conn.execute(sql, params)
+            while True:
+                chunk = cursor.fetchmany(chunk_size)
+                if not chunk:
+                    break
+                if units != CANONICAL_UNITS:
+                    yield from _convert_rows(chunk, units)
+                else:
+                    yield from map(list, chunk)
+        finally:
+            conn.close()
+
+    def city_info(self, city_id):
+        """Return the stored name/country/timezone for a city id, or None"""
+        with self._read_lock:
+            if self._read_conn is None:
+                self._read_conn = self._connect()
+            row = self._read_conn.execute(
+                "SELECT name, country, timezone FROM cities WHERE city_id = ?",
+                (city_id,)).fetchone()
+        if row is None:
+            return None
+        return {'name': row[0], 'country': row[1], 'timezone': row[2]}
+
+    def close(self):
+        """Flush pending writes and stop the writer thread"""
+        self._queue.put(None)
+        self._writer.join(timeout=10)
+        with self._read_lock:
+            if self._read_conn is not None:
+                self._read_conn.close()
+                self._read_conn = None
@@ -0,0 +1,88 @@
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Per-request fields attached with logging's ``extra=`` argument
+REQUEST_FIELDS = ['city', 'endpoint', 'latency_ms', 'status', 'cached']
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as JSON lines, including any per-request fields"""
+
+    def format(self, record):
+        # Level comes first so the log viewer can find it at a fixed offset
+        entry = {
+            'level': record.levelname,
+            'ts': self.formatTime(record),
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for field in REQUEST_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class CompressingRotatingFileHandler(RotatingFileHandler):
+    """Rotate on size or age and gzip rotated segments"""
+
+    def __init__(self, filename, max_bytes=0, backup_count=0, rotate_seconds=0):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count,
+                         encoding='utf-8', delay=True)
+        self.rotate_seconds = rotate_seconds
+        self.namer = lambda name: f"{name}.gz"
+        self.rotator = self._compress
+        # Age-based rotation counts from when this process started writing
+        self.opened_at = time.time()
+
+    @staticmethod
+    def _compress(source, dest):
+        with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(source)
+
+    def shouldRollover(self, record):
+        if self.rotate_seconds and time.time() - self.opened_at >= self.rotate_seconds:
+            if os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0:
+                return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.opened_at = time.time()
+
+
+def setup_logging(log_file, max_bytes=5 * 1024 * 1024, backup_count=5,
+                  rotate_hours=0, structured=False, level=logging.INFO):
+    """Route logging through a queue to a background rotating file writer
+
+    Callers only enqueue records; formatting, disk I/O, rotation and
+    compression happen on the listener thread. Returns the started
+    QueueListener, which must be stopped at exit to flush pending records.
+    """
+    handler = CompressingRotatingFileHandler(
+        log_file, max_bytes=max_bytes, backup_count=backup_count,
+        rotate_seconds=int(rotate_hours * 3600))
+    handler.setFormatter(JsonFormatter() if structured else logging.Formatter(TEXT_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+
+    listener.start()
+    return listener
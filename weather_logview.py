@@ -0,0 +1,216 @@
+import mmap
+import os
+import threading
+import numpy as np
+
+LEVELS = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
+
+# Level code stored per line; 0 means the line has no recognised level
+LEVEL_CODES = {name: i + 1 for i, name in enumerate(LEVELS)}
+
+# Level names have distinct initials, so one byte identifies the level
+_LEVEL_BY_INITIAL = np.zeros(256, dtype=np.uint8)
+for _name, _code in LEVEL_CODES.items():
+    _LEVEL_BY_INITIAL[ord(_name[0])] = _code
+
+# (prefix, offset of the level name) for the plain and JSON line formats:
+# "2025-01-01 12:00:00,000 - INFO - ..." and '{"level": "INFO", ...'
+_LEVEL_LAYOUTS = [(b" - ", 26), (b'{"level": "', 11)]
+
+# Newlines are located in blocks to bound temporary memory
+SCAN_BLOCK = 8 * 1024 * 1024
+
+# Substring matches are mapped to line numbers this many at a time
+FILTER_CHUNK = 65536
+
+
+class LogIndex:
+    """Line-offset index over a log file, read through mmap
+
+    Only the offsets of line starts (and a one-byte level code per line)
+    are kept in memory; line text is decoded on demand for the lines being
+    displayed. refresh() indexes bytes appended since the last call and
+    starts over if the file was truncated or rotated; changed_from is the
+    first line it (re)indexed, so filters can be extended incrementally.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._reset()
+
+    def _reset(self):
+        # starts[i] is the offset of line i; starts[-1] is the indexed end
+        self.starts = np.zeros(1, dtype=np.int64)
+        self.levels = np.zeros(0, dtype=np.uint8)
+        self.indexed_size = 0
+        self.changed_from = 0
+        self._ends_with_newline = True
+        self._inode = None
+
+    def __len__(self):
+        return len(self.levels)
+
+    def _map(self):
+        with open(self.path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return None, 0
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), size
+
+    def refresh(self):
+        """Index newly appended lines; returns True if the index changed"""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            changed = len(self) > 0
+            self._reset()
+            return changed
+
+        inode = (stat.st_dev, stat.st_ino)
+        reset = False
+        if inode != self._inode or stat.st_size < self.indexed_size:
+            # Truncated or rotated: lines shown so far are gone
+            reset = len(self) > 0
+            self._reset()
+            self._inode = inode
+        if stat.st_size == self.indexed_size:
+            return reset
+
+        mm, size = self._map()
+        if mm is None:
+            return reset
+        try:
+            self._index_range(mm, size)
+        finally:
+            mm.close()
+        return True
+
+    def _index_range(self, mm, size):
+        # A partial last line is indexed again now that it may be complete
+        n = len(self.levels)
+        if n and not self._ends_with_newline:
+            n -= 1
+        scan_from = int(self.starts[n])
+        self.starts = self.starts[:n + 1]
+        self.levels = self.levels[:n]
+        self.changed_from = n
+
+        # Zero-copy view over the mapping
+        buf = np.frombuffer(mm, dtype=np.uint8, count=size)
+        blocks = []
+        for block_start in range(scan_from, size, SCAN_BLOCK):
+            block = buf[block_start:min(block_start + SCAN_BLOCK, size)]
+            blocks.append(np.flatnonzero(block == 10).astype(np.int64) + (block_start + 1))
+            del block
+        ends = np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.int64)
+
+        self._ends_with_newline = mm[size - 1:size] == b"\n"
+        if not self._ends_with_newline:
+            ends = np.append(ends, size)
+        self.starts = np.concatenate([self.starts, ends])
+
+        # Tag new lines with their level by checking the fixed-width layouts
+        line_starts = self.starts[n:-1]
+        lengths = np.diff(self.starts[n:])
+        levels = np.zeros(len(line_starts), dtype=np.uint8)
+        for prefix, offset in _LEVEL_LAYOUTS:
+            candidates = np.flatnonzero((lengths > offset + 1) & (levels == 0))
+            at = line_starts[candidates]
+            match = np.ones(len(candidates), dtype=bool)
+            for k, byte in enumerate(prefix):
+                match &= buf[at + (offset - len(prefix) + k)] == byte
+            candidates = candidates[match]
+            levels[candidates] = _LEVEL_BY_INITIAL[buf[line_starts[candidates] + offset]]
+        del buf
+
+        self.levels = np.concatenate([self.levels, levels])
+        self.indexed_size = size
+
+    def get_lines(self, line_numbers):
+        """Decode the given lines (sequence of indices into the index)"""
+        if not len(line_numbers):
+            return []
+        mm, size = self._map()
+        if mm is None:
+            return []
+        try:
+            lines = []
+            for n in line_numbers:
+                start = int(self.starts[n])
+                end = min(int(self.starts[n + 1]), size)
+                if start >= size:
+                    break
+                lines.append(mm[start:end].decode('utf-8', errors='replace').rstrip("\r\n"))
+            return lines
+        finally:
+            mm.close()
+
+    def filter(self, min_level=None, text=None, first_line=0):
+        """Return the line numbers matching a minimum level and/or substring
+
+        Only lines from first_line on are searched, so newly indexed lines
+        can be filtered without rescanning the file. Returns None when no
+        filter is active (all lines match).
+        """
+        mask = None
+        if min_level and min_level in LEVEL_CODES:
+            mask = self.levels[first_line:] >= LEVEL_CODES[min_level]
+
+        if text:
+            hits = np.zeros(len(self) - first_line, dtype=bool)
+            needle = text.encode('utf-8')
+            positions = []
+
+            def mark_lines():
+                # Map a chunk of match offsets to their lines in one pass
+                lines = np.searchsorted(self.starts, np.array(positions, dtype=np.int64),
+                                        side='right') - 1
+                hits[lines - first_line] = True
+                positions.clear()
+
+            mm, size = self._map()
+            if mm is not None:
+                try:
+                    end = min(self.indexed_size, size)
+                    pos = mm.find(needle, int(self.starts[first_line]), end)
+                    while pos != -1:
+                        positions.append(pos)
+                        if len(positions) >= FILTER_CHUNK:
+                            mark_lines()
+                        # One match per line is enough: go on from the next line
+                        newline = mm.find(b"\n", pos, end)
+                        if newline == -1:
+                            break
+                        pos = mm.find(needle, newline + 1, end)
+                finally:
+                    mm.close()
+            if positions:
+                mark_lines()
+            mask = hits if mask is None else mask & hits
+
+        if mask is None:
+            return None
+        return np.flatnonzero(mask) + first_line
+
+    def filter_async(self, min_level, text, callback):
+        """Run filter() in a background thread and pass its result to callback
+
+        The callback receives (matches, error) and runs on the worker
+        thread. Do not refresh() the index until it has been called.
+        """
+        def worker():
+            try:
+                matches, error = self.filter(min_level, text), None
+            except Exception as e:
+                matches, error = None, e
+            callback(matches, error)
+
+        thread = threading.Thread(target=worker, name='log-filter', daemon=True)
+        thread.start()
+        return thread
+
+    def extend_filter(self, matches, min_level=None, text=None):
+        """Update filter() results for the lines indexed by the last refresh()"""
+        kept = matches[matches < self.changed_from]
+        new = self.filter(min_level, text, first_line=self.changed_from)
+        return kept if new is None else np.concatenate([kept, new])
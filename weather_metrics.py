@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+import numpy as np
+
+# Samples kept per stage for percentiles; counts and totals cover all samples
+RESERVOIR_SIZE = 2048
+
+
+class Histogram:
+    """Latency samples (ms) for one stage: recent window plus running totals"""
+
+    def __init__(self, size=RESERVOIR_SIZE):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.samples.append(ms)
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def summary(self):
+        p50, p95, p99 = np.percentile(np.fromiter(self.samples, dtype=np.float64),
+                                      [50, 95, 99])
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count, 2),
+            'p50_ms': round(float(p50), 2),
+            'p95_ms': round(float(p95), 2),
+            'p99_ms': round(float(p99), 2),
+            'max_ms': round(self.max, 2)
+        }
+
+
+class Metrics:
+    """Thread-safe registry of per-stage latency histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self.started = datetime.now()
+
+    def record(self, name, ms):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.add(ms)
+
+    @contextmanager
+    def span(self, name):
+        """Time the enclosed block and record it under name (also on errors)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - started) * 1000)
+
+    def snapshot(self):
+        """Return {stage: summary} for every stage recorded so far"""
+        with self._lock:
+            return {name: histogram.summary()
+                    for name, histogram in sorted(self._histograms.items())}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self.started = datetime.now()
+
+    def dump(self, path):
+        """Write the current snapshot to a JSON file"""
+        # Imported here to keep this module free of app dependencies
+        from weather_config import atomic_write_json
+        atomic_write_json(path, {
+            'since': self.started.isoformat(timespec='seconds'),
+            'written': datetime.now().isoformat(timespec='seconds'),
+            'stages': self.snapshot()
+        })
+
+
+# Process-wide registry shared by the app, client and batch mode
+metrics = Metrics()
+span = metrics.span
@@ -0,0 +1,353 @@
+"""Local stand-in for the OpenWeatherMap API, plus a response recorder
+
+Usage:
+    OWM_RECORD=owm.jsonl python main.py          # record real responses
+    python weather_mock.py --archive owm.jsonl   # replay them on port 8765
+    python weather_mock.py --latency 80 --error-rate 0.02 --throttle-rate 0.01
+    OWM_BASE_URL=http://127.0.0.1:8765 python main.py
+
+Cities missing from the archive get synthesized (deterministic per city)
+responses unless --no-synthesize is given. Like batch mode, this module
+must not import tkinter, PIL or matplotlib.
+"""
+import argparse
+import base64
+import hashlib
+import json
+import logging
+import math
+import random
+import struct
+import sys
+import threading
+import time
+import zlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from weather_cache import normalize_city
+from weather_scheduler import TokenBucket
+
+# OWM URL paths; the archive records which endpoint each response came from
+ENDPOINT_PATHS = {
+    '/data/2.5/weather': 'current',
+    '/data/2.5/forecast': 'forecast'
+}
+ICON_PREFIX = '/img/wn/'
+
+DESCRIPTIONS = [
+    ('01', 'clear sky'), ('02', 'few clouds'), ('03', 'scattered clouds'),
+    ('04', 'broken clouds'), ('09', 'shower rain'), ('10', 'light rain'),
+    ('11', 'thunderstorm'), ('13', 'snow'), ('50', 'mist')
+]
+
+
+def endpoint_for(url):
+    """Return (endpoint, key) for an OWM URL, or (None, None)
+
+    The key is the normalized city name, or '#<id>' for requests by city id.
+    """
+    parsed = urlparse(url)
+    endpoint = ENDPOINT_PATHS.get(parsed.path)
+    if endpoint is not None:
+        query = parse_qs(parsed.query)
+        if 'id' in query:
+            return endpoint, f"#{query['id'][0]}"
+        return endpoint, normalize_city(query.get('q', [''])[0])
+    if parsed.path.startswith(ICON_PREFIX) and parsed.path.endswith('@2x.png'):
+        return 'icon', parsed.path[len(ICON_PREFIX):-len('@2x.png')]
+    return None, None
+
+
+class ResponseRecorder:
+    """Append API responses to a JSONL archive that the mock server replays
+
+    Install with ``session.hooks['response'].append(recorder.hook)``.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def hook(self, response, *args, **kwargs):
+        endpoint, key = endpoint_for(response.url)
+        if endpoint is None:
+            return response
+
+        record = {'endpoint': endpoint, 'key': key, 'status': response.status_code}
+        if endpoint == 'icon':
+            record['body_b64'] = base64.b64encode(response.content).decode('ascii')
+        else:
+            record['units'] = parse_qs(urlparse(response.url).query).get('units', ['standard'])[0]
+            try:
+                record['body'] = response.json()
+            except ValueError:
+                return response
+
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            try:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(line)
+            except OSError as e:
+                logging.error(f"Error recording response: {str(e)}")
+        return response
+
+
+def load_archive(path):
+    """Index an archive as {(endpoint, key, units): (status, body)}; last record wins"""
+    archive = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if 'body_b64' in record:
+                body = base64.b64decode(record['body_b64'])
+            else:
+                body = record['body']
+            archive[(record['endpoint'], record['key'], record.get('units'))] = (
+                record['status'], body)
+    return archive
+
+
+def _png(size=100, rgb=(120, 160, 220)):
+    """Encode a tiny solid-colour RGB PNG (no imaging library needed)"""
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body))
+
+    row = b'\x00' + bytes(rgb) * size
+    return (b'\x89PNG\r\n\x1a\n' +
+            chunk(b'IHDR', struct.pack('>IIBBBBB', size, size, 8, 2, 0, 0, 0)) +
+            chunk(b'IDAT', zlib.compress(row * size)) +
+            chunk(b'IEND', b''))
+
+
+def _convert(units, temp, wind_speed):
+    if units == 'imperial':
+        return round(temp * 9 / 5 + 32, 2), round(wind_speed / 0.44704, 2)
+    if units == 'metric':
+        return round(temp, 2), round(wind_speed, 2)
+    return round(temp + 273.15, 2), round(wind_speed, 2)
+
+
+def _city_seed(key):
+    return int(hashlib.sha1(key.encode('utf-8')).hexdigest()[:12], 16)
+
+
+def _city(key, seed):
+    name, _, country = key.partition(',')
+    rng = random.Random(seed)
+    lat = round(rng.uniform(-60, 70), 4)
+    lon = round(rng.uniform(-180, 180), 4)
+    return {
+        'id': 1000000 + seed % 9000000,
+        'name': name.strip().title() or 'Nowhere',
+        'country': country.strip().upper()[:2] or 'XX',
+        'coord': {'lat': lat, 'lon': lon},
+        'timezone': int(round(lon / 15)) * 3600
+    }
+
+
+def _conditions(rng, units, dt, base_temp, utc_offset):
+    # Daily temperature cycle peaking mid-afternoon local time
+    hour = ((dt + utc_offset) % 86400) / 3600
+    temp = base_temp + 5 * math.sin((hour - 9) / 24 * 2 * math.pi) + rng.gauss(0, 1)
+    code, description = DESCRIPTIONS[rng.randrange(len(DESCRIPTIONS))]
+    variant = 'd' if 6 <= hour < 18 else 'n'
+    temp, wind_speed = _convert(units, temp, abs(rng.gauss(4, 2)))
+    rain = round(rng.uniform(0, 3), 2) if code in ('09', '10', '11') else 0
+    return {
+        'main': {
+            'temp': temp, 'feels_like': temp,
+            'temp_min': round(temp - 1, 2), 'temp_max': round(temp + 1, 2),
+            'pressure': rng.randint(995, 1030), 'humidity': rng.randint(30, 100)
+        },
+        'weather': [{'main': description.title(), 'description': description,
+                     'icon': code + variant}],
+        'wind': {'speed': wind_speed, 'deg': rng.randint(0, 359)},
+        'clouds': {'all': rng.randint(0, 100)}
+    }, rain
+
+
+def synthesize(endpoint, key, units, now=None):
+    """Build a plausible, per-city deterministic OWM response"""
+    now = int(time.time() if now is None else now)
+    seed = _city_seed(key)
+    city = _city(key, seed)
+    base_temp = 25 - abs(city['coord']['lat']) * 0.4
+
+    if endpoint == 'current':
+        dt = now - now % 600
+        rng = random.Random(seed ^ dt)
+        body, rain = _conditions(rng, units, dt, base_temp, city['timezone'])
+        midnight = now - (now + city['timezone']) % 86400 - city['timezone']
+        body.update({
+            'coord': city['coord'], 'id': city['id'], 'name': city['name'],
+            'dt': dt, 'timezone': city['timezone'], 'visibility': 10000, 'cod': 200,
+            'sys': {'country': city['country'], 'sunrise': midnight + 6 * 3600,
+                    'sunset': midnight + 18 * 3600}
+        })
+        if rain:
+            body['rain'] = {'1h': rain}
+        return body
+
+    start = now - now % 10800 + 10800
+    items = []
+    for i in range(40):
+        dt = start + i * 10800
+        item, rain = _conditions(random.Random(seed ^ dt), units, dt, base_temp,
+                                 city['timezone'])
+        item['dt'] = dt
+        if rain:
+            item['rain'] = {'3h': rain}
+        items.append(item)
+    return {
+        'cod': '200', 'cnt': len(items), 'list': items,
+        'city': {'id': city['id'], 'name': city['name'], 'coord': city['coord'],
+                 'country': city['country'], 'timezone': city['timezone']}
+    }
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; avoid delayed-ACK stalls
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        logging.debug(format % args)
+
+    def _send(self, status, body, content_type='application/json', headers=None):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        options = self.server.options
+        if options.latency or options.jitter:
+            time.sleep(max(0.0, random.gauss(options.latency, options.jitter)) / 1000)
+
+        endpoint, key = endpoint_for(self.path)
+        if endpoint is None:
+            self._send(404, {'cod': 404, 'message': 'unknown endpoint'})
+            return
+
+        if random.random() < options.throttle_rate or not self.server.allow():
+            self._send(429, {'cod': 429, 'message': 'rate limit exceeded'},
+                       headers={'Retry-After': str(options.retry_after)})
+            return
+        if random.random() < options.error_rate:
+            self._send(500, {'cod': 500, 'message': 'internal error'})
+            return
+
+        if endpoint == 'icon':
+            record = self.server.archive.get(('icon', key, None))
+            self._send(200, record[1] if record else self.server.icon, 'image/png')
+            return
+
+        query = parse_qs(urlparse(self.path).query)
+        if not query.get('appid', [''])[0]:
+            self._send(401, {'cod': 401, 'message': 'Invalid API key'})
+            return
+        units = query.get('units', ['standard'])[0]
+
+        record = self.server.archive.get((endpoint, key, units))
+        if record is None and key.startswith('#'):
+            # Requests by id are answered like the name that returned that id
+            key = self.server.names_by_id.get(key, '')
+            record = self.server.archive.get((endpoint, key, units))
+        if record is not None:
+            self.server.learn_id(key, record[1])
+            self._send(*record)
+        elif options.synthesize and key:
+            body = synthesize(endpoint, key, units)
+            self.server.learn_id(key, body)
+            self._send(200, body)
+        else:
+            self._send(404, {'cod': '404', 'message': 'city not found'})
+
+
+class MockServer(ThreadingHTTPServer):
+    """Threaded mock OWM server configured by parsed command-line options"""
+
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, options):
+        super().__init__((options.host, options.port), MockHandler)
+        self.options = options
+        self.archive = load_archive(options.archive) if options.archive else {}
+        self.icon = _png()
+        self._bucket = TokenBucket(options.quota) if options.quota else None
+        self._bucket_lock = threading.Lock()
+        # '#<id>' -> city name, learned from responses served by name
+        self.names_by_id = {}
+
+    def learn_id(self, key, body):
+        if not key or key.startswith('#') or not isinstance(body, dict):
+            return
+        city_id = body.get('id', (body.get('city') or {}).get('id'))
+        if city_id is not None:
+            self.names_by_id[f"#{city_id}"] = key
+
+    def allow(self):
+        """Apply the per-minute quota, if any"""
+        if self._bucket is None:
+            return True
+        with self._bucket_lock:
+            if self._bucket.wait_time() > 0:
+                return False
+            self._bucket.take()
+            return True
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="weather_mock.py",
+        description="Serve recorded or synthesized OpenWeatherMap responses locally")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--archive', default=None,
+                        help="JSONL archive recorded with OWM_RECORD / --record")
+    parser.add_argument('--no-synthesize', dest='synthesize', action='store_false',
+                        help="answer 404 for cities that are not in the archive")
+    parser.add_argument('--latency', type=float, default=0,
+                        help="mean added latency in ms (default: 0)")
+    parser.add_argument('--jitter', type=float, default=0,
+                        help="standard deviation of the added latency in ms")
+    parser.add_argument('--error-rate', type=float, default=0,
+                        help="fraction of requests answered with HTTP 500")
+    parser.add_argument('--throttle-rate', type=float, default=0,
+                        help="fraction of requests answered with HTTP 429")
+    parser.add_argument('--quota', type=int, default=0,
+                        help="requests per minute before answering 429 (default: unlimited)")
+    parser.add_argument('--retry-after', type=int, default=30,
+                        help="Retry-After seconds sent with 429 responses")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    options = parse_args(sys.argv[1:] if argv is None else argv)
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    server = MockServer(options)
+    logging.info(f"Mock OpenWeatherMap API on http://{options.host}:{server.server_port} "
+                 f"({len(server.archive)} recorded responses)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
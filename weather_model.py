@@ -0,0 +1,305 @@
+from datetime import datetime, timezone
+import numpy as np
+
+
+class CurrentWeather:
+    """Current conditions: just the fields the app uses, in flat slots"""
+
+    __slots__ = ('city_id', 'name', 'country', 'lat', 'lon', 'utc_offset', 'dt',
+                 'temp', 'feels_like', 'temp_min', 'temp_max', 'humidity', 'pressure',
+                 'wind_speed', 'wind_deg', 'clouds', 'precipitation', 'visibility',
+                 'sunrise', 'sunset', 'icon', 'description')
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields[name])
+
+    @classmethod
+    def from_owm(cls, current):
+        """Build a record from an OpenWeatherMap current weather response"""
+        main = current['main']
+        wind = current.get('wind', {})
+        sys_info = current.get('sys', {})
+        coord = current.get('coord', {})
+        weather = current['weather'][0]
+        return cls(
+            city_id=current.get('id'), name=current['name'], country=sys_info.get('country', ''),
+            lat=coord.get('lat'), lon=coord.get('lon'), utc_offset=current.get('timezone', 0),
+            dt=current['dt'], temp=main['temp'], feels_like=main['feels_like'],
+            temp_min=main['temp_min'], temp_max=main['temp_max'],
+            humidity=main['humidity'], pressure=main['pressure'],
+            wind_speed=wind.get('speed', 0), wind_deg=wind.get('deg', 0),
+            clouds=current.get('clouds', {}).get('all', 0),
+            precipitation=(current.get('rain', {}).get('1h', 0) +
+                           current.get('snow', {}).get('1h', 0)),
+            visibility=current.get('visibility', 0),
+            sunrise=sys_info.get('sunrise'), sunset=sys_info.get('sunset'),
+            icon=weather['icon'], description=weather['description'])
+
+    @property
+    def display_name(self):
+        """'City, CC' as shown in the UI and exports"""
+        return f"{self.name}, {self.country}"
+
+    def local_time(self, timestamp):
+        """City-local datetime for a Unix timestamp (e.g. dt, sunrise, sunset)"""
+        return datetime.fromtimestamp(timestamp + self.utc_offset, timezone.utc)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def __eq__(self, other):
+        if not isinstance(other, CurrentWeather):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+
+class ForecastColumns:
+    """Forecast list parsed once into NumPy columns
+
+    Each numeric field is a 1-D array aligned with ``dt``. Icon and
+    description strings are stored once in ``codes`` and referenced by
+    index from ``code_idx``.
+    """
+
+    NUMERIC_FIELDS = [
+        ('temp', np.float64),
+        ('temp_min', np.float64),
+        ('temp_max', np.float64),
+        ('humidity', np.int16),
+        ('pressure', np.int32),
+        ('wind_speed', np.float64),
+        ('wind_deg', np.float64),
+        ('clouds', np.int16),
+        ('precipitation', np.float64)
+    ]
+
+    def __init__(self, dt, columns, code_idx, codes, utc_offset=0, city=None):
+        self.dt = dt
+        self.columns = columns
+        self.code_idx = code_idx
+        self.codes = codes
+        self.utc_offset = utc_offset
+        self.city = city or {}
+        self._local_dates = None
+        self._daily = None
+
+        # Local calendar day of each slot (days since the epoch)
+        self.day_index = (dt + utc_offset) // 86400
+
+        for name, _ in self.NUMERIC_FIELDS:
+            setattr(self, name, columns[name])
+
+    @classmethod
+    def from_owm(cls, forecast):
+        """Build columns from an OpenWeatherMap forecast response"""
+        items = forecast['list']
+        values = {name: [] for name, _ in cls.NUMERIC_FIELDS}
+        dts = []
+        code_idx = []
+        code_table = {}
+
+        for item in items:
+            main = item['main']
+            wind = item.get('wind', {})
+            weather = item['weather'][0]
+
+            dts.append(item['dt'])
+            values['temp'].append(main['temp'])
+            values['temp_min'].append(main['temp_min'])
+            values['temp_max'].append(main['temp_max'])
+            values['humidity'].append(main['humidity'])
+            values['pressure'].append(main['pressure'])
+            values['wind_speed'].append(wind.get('speed', 0))
+            values['wind_deg'].append(wind.get('deg', 0))
+            values['clouds'].append(item.get('clouds', {}).get('all', 0))
+            values['precipitation'].append(
+                item.get('rain', {}).get('3h', 0) + item.get('snow', {}).get('3h', 0))
+
+            code = (weather['icon'], weather['description'])
+            code_idx.append(code_table.setdefault(code, len(code_table)))
+
+        dt = np.array(dts, dtype=np.int64)
+        columns = {name: np.array(values[name], dtype=dtype)
+                   for name, dtype in cls.NUMERIC_FIELDS}
+
+        # Days and times are in the city's local time; fall back to the
+        # machine's offset if the response has no timezone
+        city = forecast.get('city') or {}
+        utc_offset = city.get('timezone')
+        if utc_offset is None:
+            utc_offset = 0
+            if len(dt):
+                offset = datetime.fromtimestamp(int(dt[0])).astimezone().utcoffset()
+                utc_offset = int(offset.total_seconds())
+
+        return cls(dt, columns, np.array(code_idx, dtype=np.int16),
+                   list(code_table), int(utc_offset), city)
+
+    def __len__(self):
+        return len(self.dt)
+
+    def __eq__(self, other):
+        if not isinstance(other, ForecastColumns):
+            return NotImplemented
+        return (self.utc_offset == other.utc_offset and self.codes == other.codes
+                and np.array_equal(self.dt, other.dt)
+                and np.array_equal(self.code_idx, other.code_idx)
+                and all(np.array_equal(self.columns[name], other.columns[name])
+                        for name, _ in self.NUMERIC_FIELDS))
+
+    __hash__ = None
+
+    @property
+    def local_dates(self):
+        """Naive city-local timestamps as datetime64[s] (usable directly by matplotlib)"""
+        if self._local_dates is None:
+            self._local_dates = (self.dt + self.utc_offset).astype('datetime64[s]')
+        return self._local_dates
+
+    def icons(self):
+        """Icon code for each forecast slot"""
+        return [self.codes[i][0] for i in self.code_idx]
+
+    def descriptions(self):
+        """Description text for each forecast slot"""
+        return [self.codes[i][1] for i in self.code_idx]
+
+    def date_strings(self):
+        """Local timestamps formatted as 'YYYY-MM-DD HH:MM'"""
+        # np.char.replace fails on an empty array under NumPy 2
+        if len(self) == 0:
+            return np.empty(0, dtype=str)
+        text = np.datetime_as_string(self.local_dates, unit='m')
+        return np.char.replace(text, 'T', ' ')
+
+    def to_dict(self, daily=False):
+        """Plain JSON-serializable form of the model, optionally with the daily aggregates"""
+        return {
+            'dt': self.dt.tolist(),
+            'columns': {name: self.columns[name].tolist() for name, _ in self.NUMERIC_FIELDS},
+            'code_idx': self.code_idx.tolist(),
+            'codes': [list(code) for code in self.codes],
+            'utc_offset': self.utc_offset,
+            'city': self.city,
+            'daily': self.daily.to_dict() if daily else None
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a model saved with to_dict()"""
+        columns = {name: np.array(data['columns'][name], dtype=dtype)
+                   for name, dtype in cls.NUMERIC_FIELDS}
+        model = cls(np.array(data['dt'], dtype=np.int64), columns,
+                    np.array(data['code_idx'], dtype=np.int16),
+                    [tuple(code) for code in data['codes']], data['utc_offset'], data['city'])
+        if data.get('daily') is not None:
+            model._daily = DailyForecast.from_dict(data['daily'])
+        return model
+
+    @property
+    def daily(self):
+        """Per-day aggregates, computed on first use and cached with the model"""
+        if self._daily is None:
+            self._daily = DailyForecast.from_columns(self)
+        return self._daily
+
+
+class DailyForecast:
+    """Per-day min/max/mean/sum aggregates of a ForecastColumns model"""
+
+    def __init__(self, days, counts, columns, icons, descriptions):
+        self.days = days
+        self.counts = counts
+        self.columns = columns
+        self.icons = icons
+        self.descriptions = descriptions
+
+        for name, values in columns.items():
+            setattr(self, name, values)
+
+    @classmethod
+    def from_columns(cls, model):
+        """Aggregate forecast slots by local calendar day"""
+        if not len(model):
+            empty = np.array([], dtype=np.float64)
+            columns = {name: empty for name in cls.column_names()}
+            return cls(np.array([], dtype='datetime64[D]'), np.array([], dtype=np.intp),
+                       columns, [], [])
+
+        # Slots are in time order, so each day is a contiguous run
+        day = model.day_index
+        starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])
+        counts = np.diff(np.r_[starts, len(day)])
+
+        def mean(values):
+            return np.add.reduceat(values.astype(np.float64), starts) / counts
+
+        columns = {
+            'temp_min': np.minimum.reduceat(model.temp_min, starts),
+            'temp_max': np.maximum.reduceat(model.temp_max, starts),
+            'temp_mean': mean(model.temp),
+            'humidity_mean': mean(model.humidity),
+            'pressure_mean': mean(model.pressure),
+            'wind_speed_mean': mean(model.wind_speed),
+            'wind_speed_max': np.maximum.reduceat(model.wind_speed, starts),
+            'clouds_mean': mean(model.clouds),
+            'precipitation_sum': np.add.reduceat(model.precipitation, starts)
+        }
+
+        # Modal condition per day, using the daytime icon variant
+        day_codes = {}
+        code_map = np.array([
+            day_codes.setdefault((icon[:2] + 'd', description), len(day_codes))
+            for icon, description in model.codes
+        ], dtype=np.intp)
+        slot_codes = code_map[model.code_idx]
+        day_pos = np.repeat(np.arange(len(starts)), counts)
+        tally = np.bincount(day_pos * len(day_codes) + slot_codes,
+                            minlength=len(starts) * len(day_codes))
+        modal = tally.reshape(len(starts), len(day_codes)).argmax(axis=1)
+
+        code_list = list(day_codes)
+        icons = [code_list[i][0] for i in modal]
+        descriptions = [code_list[i][1] for i in modal]
+
+        days = day[starts].astype('datetime64[D]')
+        return cls(days, counts, columns, icons, descriptions)
+
+    def to_dict(self):
+        return {
+            'days': np.datetime_as_string(self.days, unit='D').tolist(),
+            'counts': self.counts.tolist(),
+            'columns': {name: values.tolist() for name, values in self.columns.items()},
+            'icons': list(self.icons),
+            'descriptions': list(self.descriptions)
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        columns = {name: np.array(data['columns'][name], dtype=np.float64)
+                   for name in cls.column_names()}
+        return cls(np.array(data['days'], dtype='datetime64[D]'),
+                   np.array(data['counts'], dtype=np.intp), columns,
+                   data['icons'], data['descriptions'])
+
+    @staticmethod
+    def column_names():
+        return ['temp_min', 'temp_max', 'temp_mean', 'humidity_mean', 'pressure_mean',
+                'wind_speed_mean', 'wind_speed_max', 'clouds_mean', 'precipitation_sum']
+
+    def __len__(self):
+        return len(self.days)
+
+
+# Parsed record type for each API endpoint
+ENDPOINT_RECORDS = {
+    'current': CurrentWeather,
+    'forecast': ForecastColumns
+}
@@ -0,0 +1,62 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class RequestManager:
+    """Single-flight, latest-wins runner for user-initiated weather fetches
+
+    Requests are keyed; the app uses (canonical city key, API), without the
+    units, since data is always fetched in metric. A request for a key
+    that is already in flight joins the existing call instead of starting
+    another one. Every submit() returns a new generation token; callers
+    should drop results whose token is no longer current, so a slow
+    response for an earlier city can never overwrite a newer one. Queued
+    requests for other keys are cancelled when a newer request arrives.
+    """
+
+    def __init__(self, max_workers=2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='weather-request')
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.generation = 0
+
+    def submit(self, key, fn, *args):
+        """Run fn(*args) for key, or join the call already in flight
+
+        Returns a (generation, future) tuple.
+        """
+        with self._lock:
+            self.generation += 1
+            generation = self.generation
+
+            future = self._inflight.get(key)
+            joined = future is not None
+            if not joined:
+                future = self._executor.submit(fn, *args)
+                self._inflight[key] = future
+
+            superseded = [f for k, f in self._inflight.items() if k != key]
+
+        if not joined:
+            future.add_done_callback(lambda f: self._finished(key, f))
+
+        # Requests that have not started yet are no longer wanted; ones
+        # already running finish but their results are discarded as stale
+        for other in superseded:
+            other.cancel()
+
+        return generation, future
+
+    def _finished(self, key, future):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def is_current(self, generation):
+        """True if no request has been submitted since this generation"""
+        return generation == self.generation
+
+    def shutdown(self):
+        """Cancel queued requests and stop the worker pool"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,208 @@
+import heapq
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate`` tokens per ``per`` seconds"""
+
+    def __init__(self, rate, per=60.0, capacity=None):
+        self.fill_rate = rate / per
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+        self.updated = now
+
+    def wait_time(self, cost=1, now=None):
+        """Seconds until ``cost`` tokens are available (0 if they are now)"""
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.fill_rate
+
+    def take(self, cost=1):
+        self.tokens -= cost
+
+    def drain(self):
+        """Empty the bucket, e.g. after the provider reports a rate limit"""
+        self.tokens = 0.0
+
+
+class _Entry:
+    __slots__ = ('interval', 'seq', 'failures', 'running')
+
+    def __init__(self, interval, seq):
+        self.interval = interval
+        self.seq = seq
+        self.failures = 0
+        self.running = False
+
+
+def retry_after(error, default):
+    """Seconds to wait from a 429 response's Retry-After header"""
+    try:
+        return max(float(error.response.headers.get('Retry-After')), 1.0)
+    except (AttributeError, TypeError, ValueError):
+        return default
+
+
+class RefreshScheduler:
+    """Rate-limited background refresh of many cities, each on its own interval
+
+    Cities wait in a heap ordered by their next due time. Due cities are
+    started only when the token bucket (sized to the provider quota) has
+    room for ``calls_per_refresh`` API calls, and every reschedule adds
+    +/- ``jitter`` so refreshes do not line up. An HTTP 429 pauses all
+    refreshes (honouring Retry-After) with exponential backoff; other
+    errors back off only the failing city.
+
+    ``fetch(city)`` runs on a worker thread; ``on_result(city, result,
+    error)`` is called on that thread when it finishes.
+    """
+
+    def __init__(self, fetch, on_result, rate_per_minute=60, calls_per_refresh=2,
+                 jitter=0.1, max_workers=4, max_backoff=900):
+        self.fetch = fetch
+        self.on_result = on_result
+        self.calls_per_refresh = calls_per_refresh
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+
+        # A small burst allowance keeps refreshes spread across the minute
+        self.bucket = TokenBucket(rate_per_minute,
+                                  capacity=max(calls_per_refresh, rate_per_minute // 6))
+
+        self._cond = threading.Condition()
+        self._heap = []
+        self._entries = {}
+        self._seq = 0
+        self._paused_until = 0.0
+        self._rate_limit_strikes = 0
+        self._stopped = False
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='refresh')
+        self._thread = threading.Thread(target=self._run, name='refresh-scheduler', daemon=True)
+        self._thread.start()
+
+    def _jittered(self, seconds):
+        return seconds * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _push(self, city, entry, due):
+        self._seq += 1
+        entry.seq = self._seq
+        heapq.heappush(self._heap, (due, entry.seq, city))
+        self._cond.notify()
+
+    def sync(self, intervals, delays=None):
+        """Track exactly the cities in ``intervals`` ({city: seconds})
+
+        New cities are first refreshed after ``delays[city]`` seconds, or
+        at a random point within one interval so a large batch is spread
+        out. Cities already tracked keep their schedule; a changed
+        interval applies from their next refresh.
+        """
+        delays = delays or {}
+        now = time.monotonic()
+        with self._cond:
+            for city in list(self._entries):
+                if city not in intervals:
+                    del self._entries[city]
+
+            for city, interval in intervals.items():
+                entry = self._entries.get(city)
+                if entry is not None:
+                    entry.interval = interval
+                    continue
+                entry = _Entry(interval, 0)
+                self._entries[city] = entry
+                delay = delays.get(city)
+                if delay is None:
+                    delay = random.uniform(0, interval)
+                self._push(city, entry, now + delay)
+
+    def cities(self):
+        with self._cond:
+            return list(self._entries)
+
+    def _run(self):
+        with self._cond:
+            while not self._stopped:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    self._cond.wait(self._paused_until - now)
+                    continue
+
+                # Skip heap items for removed or rescheduled cities
+                while self._heap:
+                    due, seq, city = self._heap[0]
+                    entry = self._entries.get(city)
+                    if entry is not None and entry.seq == seq and not entry.running:
+                        break
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                if due > now:
+                    self._cond.wait(due - now)
+                    continue
+
+                wait = self.bucket.wait_time(self.calls_per_refresh, now)
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+
+                self.bucket.take(self.calls_per_refresh)
+                heapq.heappop(self._heap)
+                entry.running = True
+                self._executor.submit(self._refresh, city, entry)
+
+    def _refresh(self, city, entry):
+        result, error = None, None
+        try:
+            result = self.fetch(city)
+        except Exception as e:
+            error = e
+
+        now = time.monotonic()
+        with self._cond:
+            entry.running = False
+            status = getattr(getattr(error, 'response', None), 'status_code', None)
+            if error is None:
+                entry.failures = 0
+                self._rate_limit_strikes = 0
+                delay = self._jittered(entry.interval)
+            elif isinstance(error, requests.exceptions.HTTPError) and status == 429:
+                # Pause every refresh, not just this city
+                self._rate_limit_strikes += 1
+                backoff = min(self.max_backoff, 30 * 2 ** (self._rate_limit_strikes - 1))
+                pause = retry_after(error, backoff)
+                self._paused_until = max(self._paused_until, now + pause)
+                self.bucket.drain()
+                delay = pause + self._jittered(5)
+                logging.warning(f"Rate limited refreshing {city}; pausing refreshes for {pause:.0f} s")
+            else:
+                entry.failures += 1
+                delay = self._jittered(min(entry.interval, 60 * 2 ** (entry.failures - 1)))
+
+            if self._entries.get(city) is entry and not self._stopped:
+                self._push(city, entry, now + delay)
+
+        try:
+            self.on_result(city, result, error)
+        except Exception as e:
+            logging.error(f"Error handling refresh of {city}: {str(e)}")
+
+    def stop(self):
+        """Stop scheduling refreshes and cancel queued ones"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._executor.shutdown(wait=False, cancel_futures=True)
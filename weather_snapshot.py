@@ -0,0 +1,41 @@
+"""Snapshot of the last rendered weather, shown instantly at startup
+
+The snapshot holds the current conditions record and the forecast in
+its compact column form (with daily aggregates), so the main view can
+be drawn from one small file before any network request is made.
+"""
+import json
+import logging
+import time
+from weather_model import CurrentWeather, ForecastColumns
+
+SNAPSHOT_VERSION = 3
+
+
+def make_snapshot(city, api, current, forecast_model, saved_at=None):
+    """Build the JSON-serializable snapshot of what is on screen (canonical units)"""
+    return {
+        'version': SNAPSHOT_VERSION,
+        'city': city,
+        'api': api,
+        'saved_at': time.time() if saved_at is None else saved_at,
+        'current': current.to_dict(),
+        'forecast': forecast_model.to_dict(daily=True)
+    }
+
+
+def load_snapshot(path):
+    """Read a snapshot; returns it with 'current' and 'forecast' as records, or None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            return None
+        snapshot['current'] = CurrentWeather.from_dict(snapshot['current'])
+        snapshot['forecast'] = ForecastColumns.from_dict(snapshot['forecast'])
+        return snapshot
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        logging.error(f"Error loading weather snapshot: {str(e)}")
+        return None
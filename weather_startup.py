@@ -0,0 +1,80 @@
+"""Startup timing report for ``python main.py --profile-startup``
+
+Records phase marks (imports, Tk root, app init, first paint) and the
+cumulative import time of each top-level package, like ``-X importtime``
+but summarised. Everything is a no-op unless enable() was called. This
+module only uses the standard library so it can be imported first.
+"""
+import builtins
+import sys
+import time
+
+_enabled = False
+_started = 0.0
+_marks = []
+_imports = {}
+_depth = 0
+_original_import = builtins.__import__
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    global _depth
+    top = name.partition('.')[0]
+    # Only first imports of top-level packages are attributed (cumulatively)
+    if level or top in sys.modules or _depth:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    _depth += 1
+    started = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _depth -= 1
+        _imports[top] = _imports.get(top, 0.0) + (time.perf_counter() - started) * 1000
+
+
+def enable():
+    """Start timing; call before the application's own imports"""
+    global _enabled, _started
+    _enabled = True
+    _started = time.perf_counter()
+    builtins.__import__ = _timed_import
+
+
+def mark(label):
+    """Record the end of a startup phase"""
+    if _enabled:
+        _marks.append((label, (time.perf_counter() - _started) * 1000))
+
+
+def report_after_paint(root, out=None):
+    """Mark first paint once Tk has drawn the window, then print the report"""
+    if not _enabled:
+        return
+
+    def on_idle():
+        root.update_idletasks()
+        mark("first paint")
+        disable()
+        print_report(out or sys.stderr)
+
+    root.after_idle(on_idle)
+
+
+def disable():
+    global _enabled
+    _enabled = False
+    builtins.__import__ = _original_import
+
+
+def print_report(out, top=15):
+    print("Startup profile (ms since main.py started):", file=out)
+    previous = 0.0
+    for label, at in _marks:
+        print(f"  {label:<20} {at:9.1f}  (+{at - previous:.1f})", file=out)
+        previous = at
+
+    print(f"Slowest imports (cumulative ms, top {top}):", file=out)
+    for name, ms in sorted(_imports.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {name:<20} {ms:9.1f}", file=out)
+    out.flush()
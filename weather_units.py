@@ -0,0 +1,52 @@
+"""Unit conversion for display, charts and export
+
+Weather data is fetched, cached and stored in one canonical unit system
+(metric: °C, m/s, metres) and converted only when it is shown, so
+switching units needs no network request. The converters accept scalars
+or NumPy arrays.
+"""
+import numpy as np
+
+# Unit system used for API requests and for every stored value
+CANONICAL_UNITS = 'metric'
+
+MPS_PER_MPH = 0.44704
+METRES_PER_MILE = 1609.344
+
+UNIT_LABELS = {
+    'metric': {'temp': '°C', 'speed': 'm/s', 'distance': 'km'},
+    'imperial': {'temp': '°F', 'speed': 'mph', 'distance': 'mi'}
+}
+
+
+def labels(units):
+    """Unit symbols for temperature, wind speed and distance"""
+    return UNIT_LABELS.get(units, UNIT_LABELS[CANONICAL_UNITS])
+
+
+def temperature(celsius, units):
+    """Convert °C to the display unit system"""
+    if units == 'imperial':
+        return np.asarray(celsius) * 9 / 5 + 32
+    return celsius
+
+
+def speed(mps, units):
+    """Convert m/s to the display unit system"""
+    if units == 'imperial':
+        return np.asarray(mps) / MPS_PER_MPH
+    return mps
+
+
+def distance(metres, units):
+    """Convert metres to km or miles"""
+    if units == 'imperial':
+        return np.asarray(metres) / METRES_PER_MILE
+    return np.asarray(metres) / 1000
+
+
+def rounded(values, decimals=2):
+    """Round converted values for export, keeping None (missing) as is"""
+    if values is None:
+        return None
+    return np.round(values, decimals).tolist()